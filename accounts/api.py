@@ -1,9 +1,14 @@
 from rest_framework import generics, permissions, viewsets, mixins
 from rest_framework.response import Response
+from rest_framework.decorators import action
 from knox.models import AuthToken
+from jananihome.querybudget import QueryBudgetMixin
+from jananihome.routers import ReplicaMixin
 from .serializer import UserSerializer, RegisterSerializer, LoginSerializer, ProfileSerializer
 from .models import Profile
 from django.contrib.auth.models import User
+from posts.serializer import PostListSerializer
+from posts.timelines import timeline_posts
 
 # The generic views provided by REST framework allow you to quickly build API views that map closely to your database models.
 
@@ -67,12 +72,23 @@ class UserAPI(generics.RetrieveAPIView):
         return self.request.user
 
 
-class ProfileViewSet(mixins.CreateModelMixin,
+class ProfileViewSet(QueryBudgetMixin,
+                     ReplicaMixin,
+                     mixins.CreateModelMixin,
                      mixins.RetrieveModelMixin,
                      mixins.UpdateModelMixin,
                      viewsets.GenericViewSet):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
+    # The maximum number of queries of every action, excluding the authentication. See jananihome/querybudget.py.
+    query_budgets = {
+        'create': 3,
+        'retrieve': 1,
+        'partial_update': 2,
+        'page': 2,
+    }
+    # The actions whose GET requests read from a replica of the database. See jananihome/routers.py.
+    replica_actions = {'retrieve', 'page'}
 
     def get_permissions(self):
         """
@@ -85,7 +101,7 @@ class ProfileViewSet(mixins.CreateModelMixin,
         """
         permission_classes = []
 
-        if self.action in ['retrieve']:
+        if self.action in ['retrieve', 'page']:
             permission_classes = [permissions.AllowAny]
         elif self.action in ['create', 'partial_update']:
             permission_classes = [permissions.IsAuthenticated]
@@ -101,11 +117,58 @@ class ProfileViewSet(mixins.CreateModelMixin,
         return Response({"profile": "You are not authorized to perform this action."}, status=401)
 
     def retrieve(self, serializer, pk):
-        user = User.objects.get(username=pk)
-        try:
-            profile = Profile.objects.get(user=user)
-        except Profile.DoesNotExist:
+        # The profile is looked up by the username of its user in a single query.
+        profile = Profile.objects.filter(user__username=pk).first()
+        if profile is None:
             return Response({"profile": "Profile Does Not Exist"}, status=400)
 
         data = ProfileSerializer(profile).data
         return Response(data, status=200)
+
+    # ENDPOINT: Used to fetch everything shown on the profile page of a user at once.
+    @action(methods=['get'], detail=True)
+    def page(self, serializer, pk):
+        """
+        Endpoint for the profile page of a user, combining the user, their profile, their active posts
+        and the totals of the reactions to their posts.
+        The user and the profile are fetched in a single query and the posts in another one,
+        by the id of the user. See posts/timelines.py.
+
+        Args:
+            self: Represents the instance of the class.
+            serializer: The serializer of the model.
+            pk: Username of the user.
+
+        Returns:
+            The user, the profile (null if the user has no profile), the posts with the fields requested by
+            the fields query parameter and the totals, along with a status code of 200 (OK).
+            The email of the user is only included for the user themselves.
+            or
+            Response code of 404 (Not Found) if the user does not exist.
+        """
+        try:
+            user = User.objects.select_related('profile').get(username=pk)
+        except User.DoesNotExist:
+            return Response({"detail": "Not found."}, status=404)
+        try:
+            profile = ProfileSerializer(user.profile).data
+        except Profile.DoesNotExist:
+            profile = None
+
+        posts = PostListSerializer.from_request(self.request)
+        rows = list(timeline_posts(user.pk, active=True).with_reactions(self.request.user).values(*posts.columns()))
+
+        data = UserSerializer(user).data
+        if(self.request.user != user):
+            del data['email']
+        return Response({
+            "user": data,
+            "profile": profile,
+            "posts": posts.serialize(rows),
+            "totals": {
+                "posts": len(rows),
+                "likes": sum(row['like_count'] for row in rows),
+                "dislikes": sum(row['dislike_count'] for row in rows),
+                "comments": sum(row['comment_count'] for row in rows),
+            },
+        }, status=200)
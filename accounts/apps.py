@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
 
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
+
+    def ready(self):
+        from knox.models import AuthToken
+        from .auth import forget_token
+        post_delete.connect(forget_token, sender=AuthToken, dispatch_uid='accounts.auth.forget_token')
@@ -0,0 +1,112 @@
+import hashlib
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from knox.auth import TokenAuthentication
+from knox.models import AuthToken
+from knox.settings import CONSTANTS, knox_settings
+from rest_framework import exceptions
+
+# Knox stores only the digests of the tokens, so authenticating a token requires querying its AuthToken,
+# the user of the AuthToken and the other AuthTokens of the user (to delete the expired ones) and hashing the token.
+# CachedTokenAuthentication caches the AuthToken of a valid token, so that the token is authenticated
+# with a single query for the user. The cache is keyed by a hash of the token, the token itself is never stored.
+#
+# The cached AuthTokens are removed when the AuthToken is deleted, e.g. on logout, and expire from the cache
+# no later than the AuthToken itself.
+#
+# The cached AuthTokens are only removed from the cache of the process deleting the AuthToken, so the tokens
+# are only cached in a cache shared by the processes serving the API, such as Memcached. With the local-memory
+# cache, a revoked token would keep authenticating on the other processes until it expires from their caches,
+# so the tokens are authenticated by knox instead, unless TOKEN_CACHE_ALLOW_LOCAL is set because the API is
+# served by a single process, e.g. in the tests.
+
+CACHE_ALIAS = getattr(settings, 'TOKEN_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'TOKEN_CACHE_TIMEOUT', 300)
+
+
+def token_cache():
+    """
+    Returns the cache of the validated tokens, or None if the tokens are not cached.
+    """
+    cache = caches[CACHE_ALIAS]
+    if isinstance(cache, LocMemCache) and not getattr(settings, 'TOKEN_CACHE_ALLOW_LOCAL', False):
+        return None
+    return cache
+
+
+def token_cache_key(token):
+    return 'accounts:token:%s' % hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def digest_cache_key(digest):
+    return 'accounts:digest:%s' % digest
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    A drop-in replacement of knox.auth.TokenAuthentication, which caches the validated tokens.
+
+    If successful
+    - `request.user` will be a django `User` instance
+    - `request.auth` will be an `AuthToken` instance
+    """
+
+    def authenticate_credentials(self, token):
+        """
+        Authenticates the token with the cached AuthToken, falling back to knox if the token is not cached.
+
+        Args:
+            self: Represents the instance of the class.
+            token: The token from the Authorization header, as bytes.
+
+        Returns:
+            A tuple of the user and the AuthToken.
+        """
+        # Refreshing the expiry of the tokens on every request needs the AuthToken from the database.
+        cache = token_cache()
+        if knox_settings.AUTO_REFRESH or cache is None:
+            return super().authenticate_credentials(token)
+
+        key = token_cache_key(token.decode('utf-8'))
+        cached = cache.get(key)
+        if cached is not None:
+            if cached['expiry'] is None or cached['expiry'] > timezone.now():
+                try:
+                    user = User.objects.get(pk=cached['user'])
+                except User.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+                auth_token = AuthToken(
+                    digest=cached['digest'], token_key=cached['token_key'], user=user, expiry=cached['expiry'])
+                return self.validate_user(auth_token)
+            cache.delete(key)
+
+        user, auth_token = super().authenticate_credentials(token)
+        timeout = CACHE_TIMEOUT
+        if auth_token.expiry is not None:
+            timeout = min(timeout, (auth_token.expiry - timezone.now()).total_seconds())
+        if timeout > 0:
+            cache.set_many({
+                key: {
+                    'user': user.pk,
+                    'digest': auth_token.digest,
+                    'token_key': auth_token.token_key[:CONSTANTS.TOKEN_KEY_LENGTH],
+                    'expiry': auth_token.expiry,
+                },
+                digest_cache_key(auth_token.digest): key,
+            }, timeout=timeout)
+        return user, auth_token
+
+
+def forget_token(sender, instance, **kwargs):
+    """
+    Removes the deleted AuthToken from the cache, so that the token can no longer be used.
+    """
+    cache = token_cache()
+    if cache is None:
+        return
+    key = cache.get(digest_cache_key(instance.digest))
+    cache.delete_many([digest_cache_key(instance.digest)] + ([key] if key else []))
@@ -0,0 +1,67 @@
+import statistics
+import time
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from knox.auth import TokenAuthentication
+from knox.models import AuthToken
+from accounts import auth
+from posts.benchmark import percentile
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the authentication of knox tokens with knox.auth.TokenAuthentication and '
+            'accounts.auth.CachedTokenAuthentication on a test database and reports the latency and the number of queries.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=10,
+                            help='Number of tokens of the authenticated user, e.g. one for every device.')
+        parser.add_argument('--iterations', type=int, default=1000,
+                            help='Number of authentications made with every class.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the benchmark on a test database, which is created for the run and destroyed afterwards.
+        Use the jananihome.sqlite_settings settings module to run it locally on SQLite.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = User.objects.create_user('benchmark', password='benchmark-password')
+            token = [AuthToken.objects.create(user)[1] for _ in range(options['tokens'])][-1].encode('utf-8')
+            caches[auth.CACHE_ALIAS].clear()
+            results = [
+                self.benchmark('knox.auth.TokenAuthentication', TokenAuthentication(), token, options['iterations']),
+                self.benchmark('accounts.auth.CachedTokenAuthentication', auth.CachedTokenAuthentication(), token,
+                               options['iterations']),
+            ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write('%-42s %9s %9s %8s' % ('Authentication', 'p50 (us)', 'p95 (us)', 'Queries'))
+        for name, timings, queries in results:
+            self.stdout.write('%-42s %9.1f %9.1f %8d' % (
+                name, statistics.median(timings), percentile(timings, 95), queries))
+
+    def benchmark(self, name, authentication, token, iterations):
+        """
+        Authenticates the token repeatedly.
+
+        Returns:
+            A tuple of the name, the timings of the authentications in microseconds
+            and the number of queries made by the last authentication.
+        """
+        timings = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                authentication.authenticate_credentials(token)
+                timings.append((time.perf_counter() - start) * 1000000)
+        return name, timings, len(captured.captured_queries)
@@ -0,0 +1,20 @@
+# Generated by Django 3.0.14 on 2026-10-18 09:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_auto_20200531_0140'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='modified_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
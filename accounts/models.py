@@ -14,3 +14,5 @@ class Profile(models.Model):
   city = models.CharField(max_length=30)
   state = models.CharField(max_length=30)
   zipcode = models.CharField(max_length=10)
+  # The watermark of the incremental exports. See posts/export.py.
+  modified_at = models.DateTimeField(auto_now=True)
@@ -1,3 +1,81 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from knox.models import AuthToken
+from rest_framework.test import APIClient
+from posts.models import Post
+from .models import Profile
 
-# Create your tests here.
+
+class CachedTokenAuthenticationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', password='password')
+        self.token = AuthToken.objects.create(self.user)[1]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token %s' % self.token)
+
+    def test_cached_token_is_authenticated_with_user_query(self):
+        self.assertEqual(self.client.get('/api/auth/user').status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/user')
+        self.assertEqual(response.data['username'], 'owner')
+
+    @override_settings(TOKEN_CACHE_ALLOW_LOCAL=False)
+    def test_token_is_not_cached_in_a_local_cache(self):
+        self.assertEqual(self.client.get('/api/auth/user').status_code, 200)
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get('/api/auth/user').status_code, 200)
+
+    def test_logout_invalidates_cached_token(self):
+        self.assertEqual(self.client.get('/api/auth/user').status_code, 200)
+        self.assertEqual(self.client.post('/api/auth/logout').status_code, 204)
+        self.assertEqual(self.client.get('/api/auth/user').status_code, 401)
+
+    def test_expired_token_is_not_authenticated(self):
+        self.assertEqual(self.client.get('/api/auth/user').status_code, 200)
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(days=30)):
+            self.assertEqual(self.client.get('/api/auth/user').status_code, 401)
+        self.assertFalse(AuthToken.objects.exists())
+
+    def test_inactive_user_is_not_authenticated(self):
+        self.assertEqual(self.client.get('/api/auth/user').status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/api/auth/user').status_code, 401)
+
+
+class ProfilePageTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        Profile.objects.create(
+            user=self.user, dob='1990-01-01', phone='1234567890', phone_alt='1234567890', gender='F', is_student=False,
+            workplace_name='Workplace', workplace_address='Address', address='Address', city='City', state='State',
+            zipcode='600001')
+        posts = [Post.objects.create(owner=self.user, title='Post %d' % i, description='Description',
+                                     due_date='2030-01-01', required_amount=1000) for i in range(3)]
+        Post.objects.filter(pk=posts[0].pk).update(active=False)
+        Post.objects.filter(pk=posts[1].pk).update(like_count=2, comment_count=1)
+        self.client = APIClient()
+
+    def test_page_is_fetched_in_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/profile/owner/page/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user'], {'id': self.user.pk, 'username': 'owner'})
+        self.assertEqual(response.data['profile']['city'], 'City')
+        self.assertEqual([post['title'] for post in response.data['posts']], ['Post 2', 'Post 1'])
+        self.assertEqual(response.data['totals'], {'posts': 2, 'likes': 2, 'dislikes': 0, 'comments': 1})
+
+    def test_page_of_the_user_themselves(self):
+        User.objects.create_user('other', password='password')
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/profile/owner/page/').data['user']['email'], 'owner@example.com')
+        response = self.client.get('/api/profile/other/page/')
+        self.assertEqual((response.data['profile'], response.data['posts']), (None, []))
+        self.assertEqual(self.client.get('/api/profile/nobody/page/').status_code, 404)
@@ -0,0 +1,140 @@
+import json
+import logging
+import random
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from .queries import record_queries
+
+logger = logging.getLogger('jananihome.requests')
+
+
+class RequestTimingMiddleware:
+    """
+    Measures the number of queries and the time spent by the requests, and sends the measurements in the
+    Server-Timing header of the response and logs them as a JSON line to the jananihome.requests logger.
+    Statements executed repeatedly by a request, the signature of an N+1 loop, are logged as a warning.
+
+    The measurements are:
+        db: The time spent executing the queries, whichever step made them.
+        app: The time until the view returns, i.e. the inner middleware, the authentication, the view and the
+            serialization of the data of the response by the serializers, including the queries made meanwhile.
+        render: The time rendering the serialized data to the content of the response, e.g. to JSON.
+        total: The total time of the request in the middleware chain.
+    The app and render times are only known for the responses rendered after the view, e.g. the responses of DRF.
+
+    The middleware is configured with the REQUEST_TIMING setting and is removed from the middleware chain
+    when it is not enabled. Only a sample of the requests is measured when the SAMPLE_RATE is below 1.
+    """
+
+    def __init__(self, get_response):
+        options = getattr(settings, 'REQUEST_TIMING', {})
+        if not options.get('ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = options.get('SAMPLE_RATE', 1.0)
+        self.duplicate_threshold = options.get('DUPLICATE_THRESHOLD', 2)
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        request._timing = {}
+        start = time.perf_counter()
+        with record_queries() as queries:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        timings = [('db', queries.duration, '%d queries' % queries.count)]
+        if 'view' in request._timing:
+            view = request._timing['view']
+            timings.append(('app', view - start, 'view and serialization'))
+            timings.append(('render', request._timing.get('render', view) - view, 'rendering'))
+        timings.append(('total', total, None))
+        response['Server-Timing'] = ', '.join(
+            '%s;dur=%.2f%s' % (name, duration * 1000, ';desc="%s"' % description if description else '')
+            for name, duration, description in timings)
+
+        duplicates = queries.duplicates(self.duplicate_threshold)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': queries.count,
+            'duplicate_queries': [{'sql': sql[:200], 'count': count} for sql, count in duplicates],
+        }
+        record.update({'%s_ms' % name: round(duration * 1000, 2) for name, duration, _ in timings})
+        logger.log(logging.WARNING if duplicates else logging.INFO, json.dumps(record))
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Records the end of the view, which is followed by the rendering of the response.
+        """
+        if hasattr(request, '_timing'):
+            request._timing['view'] = time.perf_counter()
+
+            def rendered(response):
+                request._timing['render'] = time.perf_counter()
+            response.add_post_render_callback(rendered)
+        return response
+
+
+def health_checked(settings_dict):
+    """
+    Returns whether the connections to the database are persistent and checked by ConnectionHealthCheckMiddleware.
+    """
+    return bool(settings_dict.get('CONN_HEALTH_CHECKS')) and settings_dict.get('CONN_MAX_AGE', 0) != 0
+
+
+def check_on_first_use(connection):
+    """
+    Checks the connection the first time it is used by the current request, before its first query.
+    The check is made in ensure_connection, through which the connection is reached for the cursors and the
+    transactions, like in Django 4.1.
+    """
+    if not hasattr(connection, 'health_check_done'):
+        ensure_connection = connection.ensure_connection
+
+        def checked_ensure_connection():
+            if not connection.health_check_done:
+                connection.health_check_done = True
+                # A connection in a transaction, e.g. in the tests, is left alone.
+                if (connection.connection is not None and not connection.in_atomic_block
+                        and not connection.is_usable()):
+                    connection.close()
+            ensure_connection()
+        connection.ensure_connection = checked_ensure_connection
+    connection.health_check_done = False
+
+
+class ConnectionHealthCheckMiddleware:
+    """
+    Checks the persistent connections to the databases used by the requests, and closes the connections
+    which are no longer usable, e.g. after a restart of the database server or a timeout of an idle connection,
+    so that the request opens a new connection rather than failing on its first query.
+
+    The connections to the databases with the CONN_HEALTH_CHECKS option and a CONN_MAX_AGE are checked, like with
+    the option of the same name of Django 4.1. A connection is checked on its first use by a request, so the requests
+    which do not query a database, e.g. the cached responses, do not check its connection. A check is a round trip
+    to the database, much cheaper than opening a new connection. The middleware is removed from the middleware chain
+    when no database is checked.
+    """
+
+    def __init__(self, get_response):
+        if not any(health_checked(settings_dict) for settings_dict in settings.DATABASES.values()):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        checked = [connection for connection in connections.all()
+                   if health_checked(connection.settings_dict) and connection.connection is not None]
+        for connection in checked:
+            check_on_first_use(connection)
+        try:
+            return self.get_response(request)
+        finally:
+            # The connections are not checked after the request, e.g. when they are closed at its end.
+            for connection in checked:
+                connection.health_check_done = True
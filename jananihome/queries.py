@@ -0,0 +1,72 @@
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from django.db import connections
+
+# Records the queries made to the databases with execute wrappers.
+# Unlike connection.queries, execute wrappers work without DEBUG, so the queries can be recorded in production.
+
+# The statements managing the transactions rather than reading or writing data. Their number depends on whether
+# the atomic blocks are nested, e.g. inside the transaction of a TestCase, rather than on the queries of a request.
+TRANSACTION_STATEMENTS = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def is_transaction_statement(sql):
+    return sql.startswith(TRANSACTION_STATEMENTS)
+
+
+class QueryRecorder:
+    """
+    Counts the queries, their total time and the number of times every SQL statement is executed.
+    The statements are recorded with the placeholders of their parameters, so the queries that differ only
+    in their parameters, like the queries of an N+1 loop, are recorded as the same statement.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the queries recorded so far.
+        """
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def data_count(self):
+        """
+        The number of queries excluding the statements managing the transactions.
+        """
+        return sum(count for sql, count in self.statements.items() if not is_transaction_statement(sql))
+
+    def duplicates(self, threshold=2):
+        """
+        Returns the statements executed at least threshold times along with the number of times they were executed,
+        from the most executed to the least executed.
+        """
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+@contextmanager
+def record_queries():
+    """
+    Records the queries made to all the databases inside the block.
+
+    Yields:
+        The QueryRecorder.
+    """
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
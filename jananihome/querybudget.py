@@ -0,0 +1,81 @@
+import logging
+from django.conf import settings
+from .queries import record_queries
+
+logger = logging.getLogger('jananihome.querybudget')
+
+# The query budgets of the API are declared on the viewsets, next to the actions they constrain, as the maximum
+# number of queries an action may make. The authentication of the request is not part of the budget of an action,
+# as it depends on the authentication class and its cache rather than on the action. Neither are the statements
+# managing the transactions, see jananihome/queries.py.
+#
+# The budgets are checked with the QUERY_BUDGETS setting. When its MODE is 'log', the actions exceeding their budget
+# or executing a statement repeatedly, the signature of an N+1 loop, are logged as a warning to the
+# jananihome.querybudget logger. When it is 'raise', they raise QueryBudgetExceeded, which fails the tests.
+# The budgets are not checked when it is 'off'.
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryBudgetMixin:
+    """
+    Checks the queries of the actions of a viewset against their budget.
+    The budgets are declared in the query_budgets attribute of the viewset, a dictionary of the names
+    of the actions to their maximum number of queries. The repeated statements are checked for every action.
+    """
+    query_budgets = {}
+    # The queries of the action, recorded once the request is authenticated and its permissions are checked.
+    recorded_queries = None
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Records the queries of the request and checks the queries of the action against its budget.
+        The recording is stopped even when the view raises an exception.
+        """
+        if query_budget_mode() == 'off':
+            return super().dispatch(request, *args, **kwargs)
+        with record_queries() as self.query_recorder:
+            response = super().dispatch(request, *args, **kwargs)
+        if self.recorded_queries is not None:
+            self.check_query_budget(self.recorded_queries)
+        return response
+
+    def initial(self, request, *args, **kwargs):
+        """
+        Forgets the queries of the authentication once the request is authenticated and its permissions are checked.
+        """
+        super().initial(request, *args, **kwargs)
+        recorder = getattr(self, 'query_recorder', None)
+        if recorder is not None:
+            recorder.reset()
+            self.recorded_queries = recorder
+
+    def check_query_budget(self, queries):
+        """
+        Logs or raises the violations of the budget of the action, depending on the QUERY_BUDGETS setting.
+
+        Args:
+            self: Represents the instance of the class.
+            queries: The QueryRecorder of the queries made by the action.
+        """
+        name = '%s.%s' % (type(self).__name__, self.action)
+        violations = []
+        budget = self.query_budgets.get(self.action)
+        if budget is not None and queries.data_count > budget:
+            violations.append('%s made %d queries, its budget is %d.' % (name, queries.data_count, budget))
+        threshold = getattr(settings, 'QUERY_BUDGETS', {}).get('DUPLICATE_THRESHOLD', 2)
+        for sql, count in queries.duplicates(threshold):
+            violations.append('%s executed a statement %d times: %s' % (name, count, sql[:200]))
+        if not violations:
+            return
+        if query_budget_mode() == 'raise':
+            raise QueryBudgetExceeded(' '.join(violations))
+        for violation in violations:
+            logger.warning(violation)
+
+
+def query_budget_mode():
+    return getattr(settings, 'QUERY_BUDGETS', {}).get('MODE', 'off')
+
@@ -0,0 +1,98 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+# Routes the queries of the read-only actions to the replicas of the database.
+#
+# The replicas are the aliases of the DATABASE_REPLICAS setting. The viewsets list their actions which may read
+# from a replica in their replica_actions attribute. The GET requests to these actions read from a replica chosen
+# at random, every other query, and every write, is made to the default database.
+#
+# A replica lags behind the default database, so a user reading their own changes from a replica could miss them.
+# When a user changes something, their reads are pinned to the default database for REPLICA_PIN_SECONDS.
+# The pins are kept in the cache, so that they are shared by all the processes serving the API.
+
+# The database the reads of the current request are routed to, or None for the default database.
+# It is set and reset by the request in the thread serving it, so concurrent requests do not share it.
+read_database = ContextVar('read_database', default=None)
+
+
+def pin_key(user):
+    return 'routers:pinned:%s' % user.pk
+
+
+def pin_to_default(user):
+    """
+    Routes the reads of the user to the default database for REPLICA_PIN_SECONDS.
+    """
+    caches[getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', 'default')].set(
+        pin_key(user), True, timeout=getattr(settings, 'REPLICA_PIN_SECONDS', 10))
+
+
+def replica_for(user):
+    """
+    Returns the alias of the replica the reads of the user are routed to, or None when there is no replica
+    or the user has changed something recently.
+    """
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    if not replicas:
+        return None
+    if user.is_authenticated and caches[getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', 'default')].get(pin_key(user)):
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """
+    Routes the reads to the database set in read_database and the writes to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_database.get()
+
+    def db_for_write(self, model, **hints):
+        # The objects read from a replica would otherwise be saved to the replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the default database.
+        return True
+
+
+class ReplicaMixin:
+    """
+    Routes the reads of the GET requests to the actions of the viewset listed in its replica_actions attribute
+    to a replica, and pins the reads of the users who change something to the default database.
+    """
+    replica_actions = set()
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Routes the reads back to the default database once the request is handled, even when the view raises
+        an exception, so that the later requests of the thread are not routed to the replica.
+        """
+        token = read_database.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            read_database.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        """
+        Routes the reads of the action once the request is authenticated, so that the user is known.
+        """
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and self.action in self.replica_actions:
+            read_database.set(replica_for(request.user))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Pins the reads of the user to the default database after a successful change.
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method not in SAFE_METHODS and request.user.is_authenticated and response.status_code < 400:
+            pin_to_default(request.user)
+        return response
@@ -45,6 +45,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Closes the broken persistent connections to the databases. See DATABASES below.
+    'jananihome.middleware.ConnectionHealthCheckMiddleware',
+    # Opt-in, enabled with the REQUEST_TIMING setting below.
+    'jananihome.middleware.RequestTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -55,6 +59,45 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Measures the queries and the time spent by the requests. See jananihome/middleware.py.
+# The measurements of a SAMPLE_RATE fraction of the requests are sent in the Server-Timing header and logged.
+REQUEST_TIMING = {
+    'ENABLED': os.environ.get('REQUEST_TIMING_ENABLED', 'False') == 'True',
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_TIMING_SAMPLE_RATE', 1.0)),
+    # The number of times a statement is executed by a request to be reported as a duplicate.
+    'DUPLICATE_THRESHOLD': 2,
+}
+
+# Checks the queries of the actions of the viewsets against the query budgets declared on the viewsets.
+# The MODE is 'off', 'log' or 'raise'. See jananihome/querybudget.py.
+QUERY_BUDGETS = {
+    'MODE': os.environ.get('QUERY_BUDGETS_MODE', 'off'),
+    # The number of times a statement is executed by an action to be reported as a duplicate.
+    'DUPLICATE_THRESHOLD': 2,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'jananihome.requests': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'jananihome.querybudget': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 CORS_ORIGIN_ALLOW_ALL = True
 
 CORS_ALLOW_METHODS = [
@@ -69,7 +112,7 @@ CORS_ALLOW_METHODS = [
 ROOT_URLCONF = 'jananihome.urls'
 
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': ('knox.auth.TokenAuthentication', )
+    'DEFAULT_AUTHENTICATION_CLASSES': ('accounts.auth.CachedTokenAuthentication', )
 }
 
 TEMPLATES = [
@@ -94,17 +137,83 @@ WSGI_APPLICATION = 'jananihome.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# The database is configured with the DATABASE_* environment variables.
+#
+# The connections are persistent: a connection is kept by its thread between the requests, and reused for
+# DATABASE_CONN_MAX_AGE seconds, rather than opened for every request. 0 opens a connection for every request
+# and None keeps the connections open indefinitely. The persistent connections are checked on their first use
+# by every request and reopened when they are broken, unless DATABASE_CONN_HEALTH_CHECKS is False.
+# See jananihome.middleware.ConnectionHealthCheckMiddleware, and the benchmarkpool command.
+
+conn_max_age = os.environ.get('DATABASE_CONN_MAX_AGE', '60')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
-        'NAME': 'jananihome',
-        'USER': 'postgres',
-        'PASSWORD': 'fortknox',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'ENGINE': os.environ.get('DATABASE_ENGINE', 'django.db.backends.postgresql_psycopg2'),
+        'NAME': os.environ.get('DATABASE_NAME', 'jananihome'),
+        'USER': os.environ.get('DATABASE_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', 'fortknox'),
+        'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
+        'PORT': os.environ.get('DATABASE_PORT', '5432'),
+        'CONN_MAX_AGE': None if conn_max_age == 'None' else int(conn_max_age),
+        'CONN_HEALTH_CHECKS': os.environ.get('DATABASE_CONN_HEALTH_CHECKS', 'True') == 'True',
+    }
+}
+
+# A read replica of the default database, streaming its changes from it, is configured with the
+# DATABASE_REPLICA_HOST environment variable. The read-only actions of the viewsets read from the replicas,
+# see jananihome/routers.py. The tests use the default database for the replica.
+if os.environ.get('DATABASE_REPLICA_HOST'):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=os.environ['DATABASE_REPLICA_HOST'],
+        PORT=os.environ.get('DATABASE_REPLICA_PORT', DATABASES['default']['PORT']),
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['jananihome.routers.ReplicaRouter']
+
+# The aliases of the replicas the reads are routed to.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# The number of seconds the reads of a user are routed to the default database after they change something,
+# so that they read their own changes while the replicas catch up.
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# The cache must be shared between the processes serving the API: the invalidations of the cached responses,
+# the deltas of the stats, the ids of the users of the timelines, the validated tokens and the pins of the replicas are only seen
+# by the processes sharing the cache. Memcached is used by default, and configured with the CACHE_BACKEND
+# and CACHE_LOCATION environment variables. jananihome.sqlite_settings uses the local-memory cache,
+# which is only shared by the threads of a single process.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.memcached.MemcachedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', '127.0.0.1:11211'),
     }
 }
 
+# The number of seconds the responses of the anonymous post endpoints are cached for.
+POSTS_RESPONSE_CACHE_TIMEOUT = int(os.environ.get('POSTS_RESPONSE_CACHE_TIMEOUT', 60))
+
+# The number of seconds the fundraising totals and leaderboards of the posts are cached for. See posts/stats.py.
+POSTS_STATS_TIMEOUT = int(os.environ.get('POSTS_STATS_TIMEOUT', 3600))
+POSTS_LEADERBOARD_TIMEOUT = int(os.environ.get('POSTS_LEADERBOARD_TIMEOUT', 60))
+
+# The number of seconds the ids of the users of the timelines are cached for by their username. See posts/timelines.py.
+POSTS_TIMELINE_TIMEOUT = int(os.environ.get('POSTS_TIMELINE_TIMEOUT', 300))
+
+# The number of seconds the watermark of an export precedes its start, which must exceed the duration of the longest
+# transaction writing the exported rows. See posts/export.py.
+EXPORT_WATERMARK_MARGIN = int(os.environ.get('EXPORT_WATERMARK_MARGIN', 300))
+
+# The maximum number of seconds a validated knox token is cached for by accounts.auth.CachedTokenAuthentication.
+# The tokens are only cached in a cache shared by the processes, see accounts/auth.py.
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
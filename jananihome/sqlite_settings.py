@@ -0,0 +1,42 @@
+"""
+Django settings for running jananihome locally on SQLite, e.g. the tests and the benchmarks.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=jananihome.sqlite_settings python manage.py test
+    DJANGO_SETTINGS_MODULE=jananihome.sqlite_settings python manage.py benchmarkapi
+"""
+
+from .settings import *
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # The test database is a file rather than in memory, so that the tests can write to it from many threads.
+        'TEST': {'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3')},
+    },
+    # A second connection to the same database standing in for a replica, to exercise the routing of the reads.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# The test cases only access the default database, and the rows they write in their transactions are not visible
+# to the other connections, so the reads are only routed to the replica when it is listed in the DATABASE_REPLICAS
+# environment variable, e.g. DATABASE_REPLICAS=replica, or by the tests of the routing in jananihome/tests.py.
+DATABASE_REPLICAS = [alias for alias in os.environ.get('DATABASE_REPLICAS', '').split(',') if alias]
+
+# The tests and the benchmarks run in a single process, which does not need a shared cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# The validated tokens are cached in the local-memory cache as well. See accounts/auth.py.
+TOKEN_CACHE_ALLOW_LOCAL = True
+
+# The tests fail when an action exceeds its query budget.
+QUERY_BUDGETS = dict(QUERY_BUDGETS, MODE='raise')
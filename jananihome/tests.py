@@ -0,0 +1,200 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from unittest import mock
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from posts.api import PostViewSet
+from posts.models import Post
+from .middleware import ConnectionHealthCheckMiddleware
+from .querybudget import QueryBudgetExceeded
+from .routers import read_database
+from .queries import record_queries
+
+# Create your tests here.
+
+
+class RequestTimingMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = User.objects.create_user('user', password='password')
+        self.post = Post.objects.create(owner=user, title='Post', description='Description',
+                                        due_date='2030-01-01', required_amount=1000)
+
+    @override_settings(REQUEST_TIMING={'ENABLED': True})
+    def test_server_timing_header(self):
+        with self.assertLogs('jananihome.requests', 'INFO') as logs:
+            response = self.client.get('/api/posts/%d/' % self.post.pk)
+        timings = [timing.split(';')[0] for timing in response['Server-Timing'].split(', ')]
+        self.assertEqual(timings, ['db', 'app', 'render', 'total'])
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        self.assertIn('"queries": 1', logs.output[0])
+        self.assertIn('"app_ms"', logs.output[0])
+
+    def test_disabled_by_default(self):
+        response = self.client.get('/api/posts/%d/' % self.post.pk)
+        self.assertNotIn('Server-Timing', response)
+
+
+class QueryRecorderTest(TestCase):
+
+    def test_queries_differing_in_parameters_are_duplicates(self):
+        with record_queries() as queries:
+            for pk in range(3):
+                User.objects.filter(pk=pk).exists()
+            Post.objects.exists()
+        self.assertEqual(queries.count, 4)
+        self.assertEqual(len(queries.duplicates()), 1)
+        self.assertEqual(queries.duplicates()[0][1], 3)
+
+
+class QueryBudgetTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = User.objects.create_user('user', password='password')
+        self.post = Post.objects.create(owner=user, title='Post', description='Description',
+                                        due_date='2030-01-01', required_amount=1000)
+
+    @override_settings(QUERY_BUDGETS={'MODE': 'raise'})
+    def test_action_within_its_budget(self):
+        self.assertEqual(self.client.get('/api/posts/%d/' % self.post.pk).status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={'MODE': 'raise'})
+    def test_action_over_its_budget_raises(self):
+        with mock.patch.dict(PostViewSet.query_budgets, {'retrieve': 0}):
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'PostViewSet.retrieve made 1 queries, its budget is 0.'):
+                self.client.get('/api/posts/%d/' % self.post.pk)
+
+    @override_settings(QUERY_BUDGETS={'MODE': 'log'})
+    def test_action_over_its_budget_is_logged(self):
+        with mock.patch.dict(PostViewSet.query_budgets, {'retrieve': 0}):
+            with self.assertLogs('jananihome.querybudget', 'WARNING') as logs:
+                self.assertEqual(self.client.get('/api/posts/%d/' % self.post.pk).status_code, 200)
+        self.assertIn('PostViewSet.retrieve made 1 queries', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={'MODE': 'log'})
+    def test_recording_stops_when_the_action_raises(self):
+        self.client.raise_request_exception = False
+        with mock.patch.object(PostViewSet, 'retrieve', side_effect=RuntimeError):
+            self.assertEqual(self.client.get('/api/posts/%d/' % self.post.pk).status_code, 500)
+        self.assertEqual(connection.execute_wrappers, [])
+
+    @override_settings(QUERY_BUDGETS={'MODE': 'raise', 'DUPLICATE_THRESHOLD': 2})
+    def test_repeated_statements_raise(self):
+        view = PostViewSet(action='list')
+        with record_queries() as queries:
+            for pk in range(3):
+                Post.objects.filter(pk=pk).exists()
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'PostViewSet.list executed a statement 3 times'):
+            view.check_query_budget(queries)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    # The replica is a second connection to the test database, which only sees the committed rows.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user('user', password='password')
+        self.post = Post.objects.create(owner=self.user, title='Post', description='Description',
+                                        due_date='2030-01-01', required_amount=1000)
+
+    def test_safe_actions_read_from_the_replica(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connections['default']) as default:
+            with CaptureQueriesContext(connections['replica']) as replica:
+                response = self.client.get('/api/posts/%d/' % self.post.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(default), 0)
+        self.assertEqual(len(replica), 1)
+
+    def test_cached_anonymous_responses_read_from_the_default_database(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get('/api/posts/%d/' % self.post.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(replica), 0)
+
+    def test_writes_use_the_default_database(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.patch('/api/posts/%d/' % self.post.pk, {'title': 'Changed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(replica), 0)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).title, 'Changed')
+
+    def test_reads_are_pinned_to_the_default_database_after_a_write(self):
+        self.client.force_authenticate(self.user)
+        self.client.patch('/api/posts/%d/' % self.post.pk, {'title': 'Changed'}, format='json')
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get('/api/posts/%d/' % self.post.pk)
+        self.assertEqual(response.data['title'], 'Changed')
+        self.assertEqual(len(replica), 0)
+
+        # Another user still reads from the replica.
+        self.client.force_authenticate(User.objects.create_user('other', password='password'))
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.client.get('/api/posts/%d/' % self.post.pk)
+        self.assertEqual(len(replica), 1)
+
+    def test_reads_are_routed_back_when_the_action_raises(self):
+        self.client.raise_request_exception = False
+        with mock.patch.object(PostViewSet, 'retrieve', side_effect=RuntimeError):
+            self.assertEqual(self.client.get('/api/posts/%d/' % self.post.pk).status_code, 500)
+        self.assertIsNone(read_database.get())
+
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.post('/api/posts/%d/toggle/' % self.post.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(replica), 0)
+
+
+class ConnectionHealthCheckTest(TransactionTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.middleware = ConnectionHealthCheckMiddleware(self.view)
+        connection.ensure_connection()
+        self.raw_connections = []
+
+    def view(self, request):
+        # The connection used by the request, after its check.
+        self.raw_connections.append(connection.connection)
+        Post.objects.exists()
+        return HttpResponse()
+
+    def test_usable_connection_is_kept(self):
+        raw = connection.connection
+        self.middleware(RequestFactory().get('/'))
+        self.assertIs(connection.connection, raw)
+
+    def test_broken_connection_is_reopened_on_first_use(self):
+        raw = connection.connection
+        with mock.patch.object(connection, 'is_usable', return_value=False) as is_usable:
+            self.middleware(RequestFactory().get('/'))
+        self.assertEqual(is_usable.call_count, 1)
+        self.assertIsNotNone(connection.connection)
+        self.assertIsNot(connection.connection, raw)
+
+    def test_unused_connection_is_not_checked(self):
+        middleware = ConnectionHealthCheckMiddleware(lambda request: HttpResponse())
+        with mock.patch.object(connection, 'is_usable', return_value=False) as is_usable:
+            middleware(RequestFactory().get('/'))
+            connection.ensure_connection()
+        self.assertEqual(is_usable.call_count, 0)
+
+    def test_not_used_without_persistent_connections(self):
+        with mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0}):
+            with self.assertRaises(MiddlewareNotUsed):
+                ConnectionHealthCheckMiddleware(lambda request: HttpResponse())
@@ -1,18 +1,66 @@
-from rest_framework import viewsets, permissions
+import uuid
+from rest_framework import generics, viewsets, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from accounts.serializer import UserSerializer
-from .serializer import PostSerializer, LikeSerializer, DislikeSerializer, CommentSerializer
-from django.contrib.auth.models import User
-from .models import Post, Like, Dislike, Comment
+from jananihome.querybudget import QueryBudgetMixin
+from jananihome.routers import ReplicaMixin
+from .serializer import PostSerializer, CommentSerializer
+from .serializer import PostListSerializer, CommentListSerializer, DonationSerializer, MAX_DONATION_AMOUNT
+from django.db import DataError, transaction
+from django.http import StreamingHttpResponse
+from django.db.models import F
+from django.utils import timezone
+from .models import Post, Comment
+from .pagination import PostCursorPagination, CommentCursorPagination, SearchPagination
+from .reactions import react, unreact, bulk_react
+from .donations import donate
+from .export import EXPORTS, NDJSONRenderer, CSVRenderer, export_lines, export_watermark, parse_since
+from .search import search_posts, search_terms
+from .stats import post_totals, update_totals, get_totals, get_leaderboard
+from .timelines import timeline_user, timeline_posts
+from .cache import FEED, post_scope, cache_anonymous_response, invalidate_responses
+from .cache import posts_etag, last_modified, page_last_modified, not_modified, set_validators
 
 # Django REST framework allows you to combine the logic for a set of related views in a single class, called a ViewSet.
 # A ViewSet class is simply a type of class-based View, that does not provide any method handlers such as .get() or .post(), 
 # and instead provides actions such as .list() and .create().
 
-class PostViewSet(viewsets.ModelViewSet):
+# The maximum number of operations accepted by a single request to the reactions endpoint.
+MAX_BULK_REACTIONS = 500
+
+# The maximum length of the Idempotency-Key header of the donate endpoint.
+MAX_IDEMPOTENCY_KEY_LENGTH = 64
+
+class PostViewSet(QueryBudgetMixin, ReplicaMixin, viewsets.ModelViewSet):
     serializer_class = PostSerializer
-    queryset = Post.objects.all()
+    # The owner is serialized with the post, so it is fetched in the same query.
+    queryset = Post.objects.select_related('owner')
+    pagination_class = PostCursorPagination
+    # The maximum number of queries of every action, excluding the authentication. See jananihome/querybudget.py.
+    query_budgets = {
+        'list': 1,
+        'create': 1,
+        'search': 1,
+        'stats': 1,
+        'leaderboard': 3,
+        'retrieve': 1,
+        'update': 2,
+        'partial_update': 2,
+        'destroy': 6,
+        'active': 2,
+        'disabled': 1,
+        'toggle': 2,
+        'donate': 4,
+        'like': 5,
+        'removelike': 3,
+        'dislike': 5,
+        'removedislike': 3,
+        'reactions': 7,
+        'comment': 3,
+        'disablecomment': 4,
+    }
+    # The actions whose GET requests read from a replica of the database. See jananihome/routers.py.
+    replica_actions = {'list', 'retrieve', 'comment', 'active', 'search', 'stats', 'leaderboard'}
 
     def get_permissions(self):
         """
@@ -24,7 +72,7 @@ class PostViewSet(viewsets.ModelViewSet):
            The access permission for the endpoints of this viewset.
         """
 
-        if self.action in ['list', 'retrieve', 'comment', 'active']:
+        if self.action in ['list', 'retrieve', 'comment', 'active', 'search', 'stats', 'leaderboard']:
             permission_classes = [permissions.AllowAny]
         else:
             permission_classes = [permissions.IsAuthenticated]
@@ -41,65 +89,193 @@ class PostViewSet(viewsets.ModelViewSet):
             serializer: The serializer of the model.
         """
 
-        serializer.save(owner=self.request.user)
+        post = serializer.save(owner=self.request.user)
+        update_totals(post_totals(None), post_totals(post))
+        invalidate_responses(FEED)
+
+    def perform_update(self, serializer):
+        """
+        Saves the changes of the Post and invalidates its cached responses.
+
+        Args:
+            self: Represents the instance of the class.
+            serializer: The serializer of the model.
+        """
+
+        # The serializer saves the changes to the same instance, so its totals are taken before the changes.
+        old = post_totals(serializer.instance)
+        post = serializer.save()
+        update_totals(old, post_totals(post))
+        invalidate_responses(FEED, post_scope(post.pk))
+
+    def perform_destroy(self, post):
+        """
+        Deletes the Post and invalidates its cached responses.
+
+        Args:
+            self: Represents the instance of the class.
+            post: The Post to be deleted.
+        """
+
+        pk = post.pk
+        update_totals(post_totals(post), post_totals(None))
+        post.delete()
+        invalidate_responses(FEED, post_scope(pk))
 
-    # TODO: Paginate the response.
+    @cache_anonymous_response(FEED)
     def list(self, serializer):
         """
         Endpoint for list of posts in the database.
+        The response is paginated with a cursor, the next and previous pages are linked in the response.
+        The response carries an ETag and the Last-Modified time of its posts.
+        If the page has not changed, 304 (Not Modified) is returned instead.
+
+        Args:
+            self: Represents the instance of the class.
+            serializer: The serializer of the model.
+        """
+
+        # The Post owner and the reactions of the user who requested it are fetched in the same query,
+        # so a page costs a single query irrespective of its size.
+        # Only the columns of the requested fields are fetched, as rows which are serialized without building Posts.
+        serializer = PostListSerializer.from_request(self.request)
+        post = Post.objects.filter(active=True).with_reactions(self.request.user).values(*serializer.columns())
+        page = self.paginate_queryset(post)
+
+        # The page is compared with the client's copy before it is serialized.
+        etag = posts_etag(page, self.paginator.has_next, self.paginator.has_previous, *serializer.names)
+        response = not_modified(self.request, etag)
+        if response is not None:
+            return response
+
+        response = self.get_paginated_response(serializer.serialize(page))
+        return set_validators(response, etag, page_last_modified(page))
+
+    @action(methods=['get'], detail=False)
+    @cache_anonymous_response(FEED)
+    def search(self, serializer):
+        """
+        Endpoint for the full-text search of the active posts by their title and description.
+        The posts matching every word of the q query parameter are ordered from the best match to the worst
+        and paginated by page number.
+
+        Args:
+            self: Represents the instance of the class.
+            serializer: The serializer of the model.
+
+        Return:
+            A page of the matching posts with the fields of the list endpoint, along with an ETag
+            and the Last-Modified time of the posts.
+            or
+            Response code of 400 (Bad Request) if the query has no words.
+        """
+        query = self.request.query_params.get('q', '')
+        if not search_terms(query):
+            return Response({"error": "The search query is empty."}, status=400)
+
+        serializer = PostListSerializer.from_request(self.request)
+        post = search_posts(Post.objects.filter(active=True).with_reactions(self.request.user), query)
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(post.values(*serializer.columns(), 'rank'), self.request, view=self)
+
+        etag = posts_etag(page, paginator.has_next, paginator.has_previous, *serializer.names)
+        response = not_modified(self.request, etag)
+        if response is not None:
+            return response
+        response = paginator.get_paginated_response(serializer.serialize(page))
+        return set_validators(response, etag, page_last_modified(page))
+
+    @action(methods=['get'], detail=False)
+    def stats(self, serializer):
+        """
+        Endpoint for the fundraising totals of the active posts.
 
         Args:
             self: Represents the instance of the class.
             serializer: The serializer of the model.
+
+        Return:
+            The number of posts, the number of posts which have reached their goal, the required and collected amounts
+            and the percentage of the required amount collected.
         """
+        return Response(get_totals())
 
-        post = Post.objects.filter(active=True)
-        data = PostSerializer(post, many=True).data
+    @action(methods=['get'], detail=False)
+    def leaderboard(self, serializer):
+        """
+        Endpoint for the fundraising leaderboards. The leaderboards are refreshed every minute.
 
-        # The response is populated with the Post owner's information before response.
-        for post in data:
-            post['owner'] = User.objects.get(pk=post['owner']).username
-        return Response(data)
+        Args:
+            self: Represents the instance of the class.
+            serializer: The serializer of the model.
+
+        Return:
+            The open posts closest to their goal, the open posts whose due date is within the next days
+            and the owners who collected the most, with the limit query parameter entries each (10 by default, 50 at most).
+            The days query parameter is 7 by default, 90 at most.
+        """
+        try:
+            limit = int(self.request.query_params.get('limit', 10))
+            days = int(self.request.query_params.get('days', 7))
+        except ValueError:
+            return Response({"error": "The limit and days must be numbers."}, status=400)
+        if not (1 <= limit <= 50 and 0 <= days <= 90):
+            return Response({"error": "The limit must be between 1 and 50 and the days between 0 and 90."}, status=400)
+        return Response(get_leaderboard(limit, days))
 
     @action(methods=['get'], detail=True)
+    @cache_anonymous_response(FEED)
     def active(self, serializer, pk):
         """
         Endpoint for list of posts created by a certain user.
+        The response is paginated with a cursor, like the list of posts.
 
         Args:
             self: Represents the instance of the class.
             serializer: The serializer of the model.
         """
-        user = User.objects.get(username=pk)
-        post = Post.objects.filter(active=True, owner=user)
-        data = PostSerializer(post, many=True).data
-
-        # The response is populated with the Post owner's information before response.
-        for post in data:
-            post['owner'] = User.objects.get(pk=post['owner']).username
-        return Response(data)
+        # The id of the user is cached, so a page of their posts is fetched in a single query.
+        user_id = timeline_user(pk)
+        if(user_id is None):
+            return Response({"detail": "Not found."}, status=404)
+        return self.respond_with_posts(timeline_posts(user_id, active=True).with_reactions(self.request.user))
 
     @action(methods=['get'], detail=True)
     def disabled(self, serializer, pk):
         """
         Endpoint for list of posts disabled by a certain user.
+        The response is paginated with a cursor, like the list of posts.
 
         Args:
             self: Represents the instance of the class.
             serializer: The serializer of the model.
         """
         if(self.request.user.username == pk):
-            user = User.objects.get(username=pk)
-            post = Post.objects.filter(active=False, owner=user)
-            data = PostSerializer(post, many=True).data
-
-            # The response is populated with the Post owner's information before response.
-            for post in data:
-                post['owner'] = User.objects.get(pk=post['owner']).username
-            return Response(data)
+            return self.respond_with_posts(
+                timeline_posts(self.request.user.pk, active=False).with_reactions(self.request.user))
         return Response({"detail": "You are not authorized to access this data."}, status=401)
 
+    def respond_with_posts(self, posts):
+        """
+        Responds with a page of the posts, with the fields requested by the fields query parameter, along with an ETag
+        and the Last-Modified time of the posts.
+        If the client has the current page, 304 (Not Modified) is returned without serializing the posts.
+
+        Args:
+            self: Represents the instance of the class.
+            posts: The queryset of the posts.
+        """
+        serializer = PostListSerializer.from_request(self.request)
+        page = self.paginate_queryset(posts.values(*serializer.columns()))
+        etag = posts_etag(page, self.paginator.has_next, self.paginator.has_previous, *serializer.names)
+        response = not_modified(self.request, etag)
+        if response is not None:
+            return response
+        response = self.get_paginated_response(serializer.serialize(page))
+        return set_validators(response, etag, page_last_modified(page))
+
     # This function is used to respond with the requested post. The post is requested using the Post's ID.
+    @cache_anonymous_response(lambda kwargs: post_scope(kwargs['pk']))
     def retrieve(self, serializer, pk):
         """
         Endpoint for a single post in the database.
@@ -111,38 +287,29 @@ class PostViewSet(viewsets.ModelViewSet):
 
         Return:
             Requested post data along with the post owner's information.
+            The response carries an ETag and the Last-Modified time of the post.
+            If the post has not changed, 304 (Not Modified) is returned instead.
         """
 
+        # The Post is fetched along with its owner, the number of likes and dislikes and whether the user
+        # who requested it has liked or disliked the Post in a single query.
+        # If the request is not authenticated, the user's reactions are skipped.
         try:
-            post = Post.objects.get(pk=pk)
+            post = Post.objects.with_reactions(self.request.user).select_related('owner').get(pk=pk)
         except Post.DoesNotExist:
             return Response({"error": "Post does not exist in the database."}, status=400)
         
         if(post.owner != self.request.user and not post.active):
             return Response({"error": "Post has been disabled by the user."}, status=400)
 
+        # The post is compared with the client's copy before it is serialized.
+        etag, modified = posts_etag([post]), last_modified(post)
+        response = not_modified(self.request, etag, modified)
+        if response is not None:
+            return response
+
         data = PostSerializer(post).data
-        # The response is populated with the Post owner's information before response.
-        data['owner'] = post.owner.username
-
-        # The response is populated with the number of likes and dislikes before response.
-        data['likes'] = Like.objects.filter(post=post).count()
-        data['dislikes'] = Dislike.objects.filter(post=post).count()
-
-        # The response is populated with whether the user who requested it has liked or disliked the Post.
-        # If the request is not authenticated, then this part is skipped.
-        if(self.request.auth):
-            try:
-                liked = Like.objects.get(user=self.request.user, post=post)
-                data['user_liked'] = True
-            except Like.DoesNotExist:
-                data['user_liked'] = False
-            try:
-                disliked = Dislike.objects.get(user=self.request.user, post=post)
-                data['user_disliked'] = True
-            except Dislike.DoesNotExist:
-                data['user_disliked'] = False
-        return Response(data)
+        return set_validators(Response(data), etag, modified)
 
     @action(methods=['post'], detail=True)
     def toggle(self, serializer, pk):
@@ -158,12 +325,15 @@ class PostViewSet(viewsets.ModelViewSet):
         Return:
             Response code of 200 (OK) if the task is completed. Else, 401 (Unauthorized) if an unauthorized user requests it.
         """
-        post = Post.objects.get(pk=pk)
+        post = Post.objects.select_related('owner').get(pk=pk)
 
         # Checks whether the user who requested this endpoint is the same as the owner of the post.
         if(self.request.user == post.owner):
+            old = post_totals(post)
             post.active = not post.active
-            post.save()
+            post.save(update_fields=['active', 'modified_at'])
+            update_totals(old, post_totals(post))
+            invalidate_responses(FEED, post_scope(post.pk))
             return Response(status=200)
         return Response(status=401)
 
@@ -172,6 +342,7 @@ class PostViewSet(viewsets.ModelViewSet):
         """
         Endpoint for liking the post. 
         If the user who likes the post has already disliked it, the Dislike entry is removed from the database.
+        Liking a post that is already liked leaves it unchanged, so the request can be safely retried.
 
         Args:
             self: Represents the instance of the class.
@@ -179,25 +350,18 @@ class PostViewSet(viewsets.ModelViewSet):
             pk: Primary key of the post.
 
         Return:
-            Response code of 200 (OK) if the task is completed.
+            The number of likes and dislikes of the post and the user's reactions along with a status code of 200 (OK).
+            or
+            Response code of 400 (Bad Request) if the post does not exist.
         """
-        post = Post.objects.get(pk=pk)
-
-        # Deletes the dislike entry in the database if it exists.
-        try:
-            Dislike.objects.get(user=self.request.user, post=post).delete()
-        except Dislike.DoesNotExist:
-            pass
-
-        # A new like entry is created in the Database.
-        Like(post=post, user=self.request.user).save()
-        return Response(status=200)
+        return self.change_reaction(react, pk, 'like')
 
     # ENDPOINT: Used to remove a like of the post.
     @action(methods=['post'], detail=True)
     def removelike(self, serializer, pk):
         """
         Endpoint for remove a like of a post. 
+        Removing a like that does not exist leaves the post unchanged.
 
         Args:
             self: Represents the instance of the class.
@@ -205,11 +369,11 @@ class PostViewSet(viewsets.ModelViewSet):
             pk: Primary key of the post.
 
         Return:
-            Response code of 200 (OK) if the task is completed.
+            The number of likes and dislikes of the post and the user's reactions along with a status code of 200 (OK).
+            or
+            Response code of 400 (Bad Request) if the post does not exist.
         """
-        post = Post.objects.get(pk=pk)
-        Like.objects.get(post=post, user=self.request.user).delete()
-        return Response(status=200)
+        return self.change_reaction(unreact, pk, 'like')
 
     # ENDPOINT: Used to dislike the post.
     @action(methods=['post'], detail=True)
@@ -217,6 +381,7 @@ class PostViewSet(viewsets.ModelViewSet):
         """
         Endpoint for disliking the post.
         If the user who likes the post has already liked it, the Like entry is removed from the database.
+        Disliking a post that is already disliked leaves it unchanged, so the request can be safely retried.
 
         Args:
             self: Represents the instance of the class.
@@ -224,26 +389,18 @@ class PostViewSet(viewsets.ModelViewSet):
             pk: Primary key of the post.
 
         Return:
-            Response code of 200 (OK) if the task is completed.
+            The number of likes and dislikes of the post and the user's reactions along with a status code of 200 (OK).
+            or
+            Response code of 400 (Bad Request) if the post does not exist.
         """
-        post = Post.objects.get(pk=pk)
-
-        # Deletes the like entry in the database if it exists.
-        try:
-            Like.objects.get(user=self.request.user, post=post).delete()
-        except Like.DoesNotExist:
-            pass
-
-        # A new dislike entry is created in the Database.
-        Dislike(post=post, user=self.request.user).save()
-        return Response(status=200)
+        return self.change_reaction(react, pk, 'dislike')
 
     # ENDPOINT: Used to remove a dislike of the post.
     @action(methods=['post'], detail=True)
     def removedislike(self, serializer, pk):
         """
         Endpoint for removing a dislike of a post.
-        If the user who likes the post has already liked it, the Like entry is removed from the database.
+        Removing a dislike that does not exist leaves the post unchanged.
 
         Args:
             self: Represents the instance of the class.
@@ -251,13 +408,110 @@ class PostViewSet(viewsets.ModelViewSet):
             pk: Primary key of the post.
 
         Return:
-            Response code of 200 (OK) if the task is completed.
+            The number of likes and dislikes of the post and the user's reactions along with a status code of 200 (OK).
+            or
+            Response code of 400 (Bad Request) if the post does not exist.
         """
-        post = Post.objects.get(pk=pk)
-        Dislike.objects.get(post=post, user=self.request.user).delete()
-        return Response(status=200)
+        return self.change_reaction(unreact, pk, 'dislike')
+
+    # ENDPOINT: Used to like, dislike or remove the reactions of many posts at once.
+    @action(methods=['post'], detail=False)
+    def reactions(self, serializer):
+        """
+        Endpoint for applying many reactions of the user at once, such as the reactions queued by a client while offline.
+        The body of the request must be a list of operations of the form {"post": <ID of the post>, "reaction": <reaction>},
+        where the reaction is one of like, dislike, removelike and removedislike. The operations are applied in order.
+
+        Args:
+            self: Represents the instance of the class.
+            serializer: The serializer of the model.
+
+        Return:
+            The result of every operation along with a status code of 200 (OK).
+            Successful results contain the number of likes and dislikes of the post and the user's reactions,
+            failed results contain an error.
+            or
+            Response code of 400 (Bad Request) if the body is not a list of operations.
+        """
+        operations = self.request.data
+        if(not isinstance(operations, list) or len(operations) > MAX_BULK_REACTIONS
+                or not all(isinstance(operation, dict) for operation in operations)):
+            return Response({"error": "Expected a list of at most %d operations." % MAX_BULK_REACTIONS}, status=400)
+        results = bulk_react(self.request.user, operations)
+        invalidate_responses(FEED, *set(post_scope(result['post']) for result in results if 'error' not in result))
+        return Response(results, status=200)
+
+    # ENDPOINT: Used to donate to a post.
+    @action(methods=['post'], detail=True)
+    def donate(self, serializer, pk):
+        """
+        Endpoint for donating to the post. The body of the request must be of the form {"amount": <amount>}.
+        A client retrying a donation must send the same Idempotency-Key header with every attempt,
+        so that the donation is only recorded once.
+
+        Args:
+            self: Represents the instance of the class.
+            serializer: The serializer of the model.
+            pk: Primary key of the post.
+
+        Return:
+            The ID and the amount of the donation along with the collected amount of the post
+            and a status code of 201 (Created), or 200 (OK) if the donation had been recorded.
+            or
+            Response code of 400 (Bad Request) if the amount or the Idempotency-Key is invalid or the post does not exist.
+            or
+            Response code of 409 (Conflict) if the Idempotency-Key was used for a different donation.
+        """
+        body = DonationSerializer(data=self.request.data)
+        if(not body.is_valid()):
+            return Response({"error": "The amount must be a positive integer of at most %d." % MAX_DONATION_AMOUNT}, status=400)
+        amount = body.validated_data['amount']
+
+        key = self.request.META.get('HTTP_IDEMPOTENCY_KEY')
+        if(key is not None and not key):
+            return Response({"error": "The Idempotency-Key must not be empty."}, status=400)
+        if(key is not None and len(key) > MAX_IDEMPOTENCY_KEY_LENGTH):
+            return Response({"error": "The Idempotency-Key must be at most %d characters." % MAX_IDEMPOTENCY_KEY_LENGTH}, status=400)
+        # The keys are scoped to the user, so that a user cannot replay the donations of another user.
+        key = '%s:%s' % (self.request.user.pk, key or uuid.uuid4().hex)
+
+        try:
+            donation, created = donate(pk, self.request.user, amount, key)
+        except Post.DoesNotExist:
+            return Response({"error": "Post does not exist in the database."}, status=400)
+        except DataError:
+            # The collected amount would overflow its column. Nothing is recorded in that case.
+            return Response({"error": "The post cannot collect this amount."}, status=400)
+        if(str(donation.post_id) != str(pk) or donation.amount != amount):
+            return Response({"error": "The Idempotency-Key was used for another donation."}, status=409)
+
+        invalidate_responses(FEED, post_scope(pk))
+        collected_amount = Post.objects.values_list('collected_amount', flat=True).get(pk=pk)
+        return Response({
+            "donation": donation.pk,
+            "amount": donation.amount,
+            "collected_amount": collected_amount,
+        }, status=201 if created else 200)
+
+    def change_reaction(self, change, pk, reaction):
+        """
+        Applies a change of the requesting user's reaction to the post and responds with the new state of the post.
+
+        Args:
+            self: Represents the instance of the class.
+            change: Either reactions.react or reactions.unreact.
+            pk: Primary key of the post.
+            reaction: Either 'like' or 'dislike'.
+        """
+        try:
+            state = change(pk, self.request.user, reaction)
+        except Post.DoesNotExist:
+            return Response({"error": "Post does not exist in the database."}, status=400)
+        invalidate_responses(FEED, post_scope(pk))
+        return Response(state, status=200)
 
     @action(methods=['post', 'get'], detail=True)
+    @cache_anonymous_response(lambda kwargs: post_scope(kwargs['pk']))
     def comment(self, serializer, pk):
         """
         This method serves as two endpoints.
@@ -272,35 +526,37 @@ class PostViewSet(viewsets.ModelViewSet):
         Return:
             Response code of 400 (Bad Request) if the post is disabled.
             GET: 
-                The serialized data of the list of comments associated to the post.
+                A page of the serialized data of the list of comments associated to the post.
             POST:
                 The newly created comment data along with a status code of 200 (OK).
                 or
                 Response code of 401 (Unauthorized) if the user is not authenticated.
         """
 
-        # Checks whether the post is active.
-        post = Post.objects.get(pk=pk)
-        if(not post.active):
+        # Checks whether the post exists and is active.
+        post = Post.objects.filter(pk=pk).first()
+        if(post is None or not post.active):
             return Response({"error": "Post does not exist in the database."}, status=400)
 
-        # TODO: Paginate the response
-        # 1. GET: The comments are fetched from the database. 
+        # 1. GET: The comments are fetched from the database along with the users who commented.
+        # The comments are paginated with a cursor, the next and previous pages are linked in the response.
         if self.request.method == 'GET':
-            comments = Comment.objects.filter(post=post, disabled=False)
-            serializer = CommentSerializer(comments, many=True)
-
-            # The user information of the respective comments are populated before response.
-            for comment in serializer.data:
-                comment['user'] = User.objects.get(pk=comment['user']).username
-            return Response(serializer.data)
+            serializer = CommentListSerializer.from_request(self.request)
+            comments = Comment.objects.filter(post=post, disabled=False).values(*serializer.columns())
+            paginator = CommentCursorPagination()
+            page = paginator.paginate_queryset(comments, self.request, view=self)
+            return paginator.get_paginated_response(serializer.serialize(page))
 
         # 2. POST: The request is checked for authentication. 
         # If the request is authenticated, a new entry in the database is created.
         elif self.request.method == 'POST':
-            if self.request.auth != None:
+            if self.request.user.is_authenticated:
                 comment = Comment(post=post, user=self.request.user, body=self.request.data['comment'])
-                comment.save()
+                with transaction.atomic():
+                    comment.save()
+                    Post.objects.filter(pk=post.pk).update(
+                        comment_count=F('comment_count') + 1, modified_at=timezone.now())
+                invalidate_responses(FEED, post_scope(post.pk))
                 return Response(CommentSerializer(comment).data, status=200)
             return Response(status=401)
 
@@ -332,7 +588,50 @@ class PostViewSet(viewsets.ModelViewSet):
         if(comment.user != self.request.user):
             return Response(status=401)
 
-        # Sets the value of the Disabled field to True and saves it.
-        comment.disabled = True
-        comment.save()
+        # Sets the value of the Disabled field to True along with the comment count of the post.
+        # The comment is only counted once if it is disabled by concurrent requests.
+        with transaction.atomic():
+            disabled = Comment.objects.filter(pk=comment.pk, disabled=False).update(disabled=True)
+            Post.objects.filter(pk=comment.post_id).update(
+                comment_count=F('comment_count') - disabled, modified_at=timezone.now())
+        invalidate_responses(FEED, post_scope(comment.post_id))
         return Response(status=200)
+
+
+class ExportAPI(generics.GenericAPIView):
+    permission_classes = [permissions.IsAdminUser]
+    # The format of the export is chosen with the format query parameter, e.g. ?format=csv, or the Accept header.
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    # ENDPOINT: Used to stream the full or incremental export of a table for reporting.
+    def get(self, request, name):
+        """
+        Streams the rows of the table as NDJSON or CSV. The rows are fetched from the database in chunks
+        while the response is sent, see posts/export.py. This endpoint is only accessible to the staff.
+
+        Args:
+            self: Represents the instance of the class.
+            request: The request itself.
+            name: The name of the table, one of posts, comments, likes, dislikes, donations and profiles.
+
+        Returns:
+            The streamed rows along with the X-Export-Watermark header, which is passed as the since query parameter
+            of the next request to only export the rows changed in between.
+            or
+            Response code of 400 (Bad Request) if since is not a date and time.
+            or
+            Response code of 404 (Not Found) if the table does not exist.
+        """
+        if(name not in EXPORTS):
+            return Response({"error": "Unknown table, expected one of %s." % ', '.join(EXPORTS)}, status=404)
+        try:
+            since = parse_since(request.query_params['since']) if 'since' in request.query_params else None
+        except ValueError:
+            return Response({"error": "since must be an ISO 8601 date and time."}, status=400)
+
+        renderer = request.accepted_renderer
+        watermark = export_watermark()
+        response = StreamingHttpResponse(export_lines(name, renderer.format, since), content_type=renderer.media_type)
+        response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (name, renderer.format)
+        response['X-Export-Watermark'] = watermark.isoformat()
+        return response
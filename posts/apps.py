@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from .search import restore_search_triggers
+        post_migrate.connect(restore_search_triggers, sender=self, dispatch_uid='posts.search.restore_search_triggers')
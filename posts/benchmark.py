@@ -0,0 +1,261 @@
+import itertools
+import statistics
+import time
+from collections import namedtuple
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from knox.models import AuthToken
+from rest_framework.test import APIClient
+from accounts.api import ProfileViewSet
+from jananihome.queries import record_queries
+from accounts.models import Profile
+from .api import PostViewSet
+from .models import Post, Comment
+from .seed import seed
+
+# Drives every route of posts/urls.py and accounts/urls.py through the test client and records the latency,
+# the number of queries and the size of the response of every request.
+#
+# Every endpoint has a query budget, which is the maximum number of queries a single request may make.
+# The budgets include the queries made by the token authentication of authenticated requests,
+# but not the statements managing the transactions.
+# The response cache is cleared before every request, so the budgets hold for the requests that miss the cache.
+# The budgets of the actions of the viewsets are the budgets declared on the viewsets, see jananihome/querybudget.py,
+# to which the queries of the token authentication are added for the authenticated requests.
+
+PASSWORD = 'benchmark-password'
+
+# The number of queries of the authentication of a token which is not cached.
+AUTHENTICATED = 3
+
+Endpoint = namedtuple('Endpoint', ['name', 'budget', 'request'])
+Result = namedtuple('Result', ['name', 'budget', 'requests', 'p50', 'p95', 'queries', 'size'])
+
+
+def run(users=20, posts=200, reactions=1000, comments=1000, iterations=20):
+    """
+    Seeds the database and benchmarks every endpoint of the API.
+
+    Args:
+        users: Number of seeded users.
+        posts: Number of seeded posts.
+        reactions: Number of seeded likes and dislikes.
+        comments: Number of seeded comments.
+        iterations: Number of requests made to every endpoint.
+
+    Returns:
+        A list of Results, one for every endpoint.
+    """
+    seed(users=users, posts=posts, reactions=reactions, comments=comments, prefix='benchmark')
+    results = []
+    for endpoint in endpoints(iterations):
+        timings, queries, sizes = [], [], []
+        for i in range(iterations):
+            cache.clear()
+            # The queries are recorded on every connection, including the replicas.
+            with record_queries() as captured:
+                start = time.perf_counter()
+                response = endpoint.request(i)
+                # The rows of the streamed responses are queried while the response is consumed.
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+                timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code < 400, '%s responded with %s' % (endpoint.name, response.status_code)
+            queries.append(captured.data_count)
+            sizes.append(len(content))
+        results.append(Result(
+            name=endpoint.name,
+            budget=endpoint.budget,
+            requests=iterations,
+            p50=statistics.median(timings),
+            p95=percentile(timings, 95),
+            queries=max(queries),
+            size=statistics.mean(sizes),
+        ))
+    return results
+
+
+def over_budget(results):
+    """
+    Returns the Results of the endpoints that made more queries than their budget.
+    """
+    return [result for result in results if result.queries > result.budget]
+
+
+def percentile(values, percent):
+    """
+    Returns the percentile of the values with the nearest-rank method.
+    """
+    values = sorted(values)
+    return values[max(int(round(percent / 100 * len(values))) - 1, 0)]
+
+
+def endpoints(iterations):
+    """
+    Creates the data used by the requests and returns the Endpoints to be benchmarked.
+    Every request gets its own data when a request cannot be repeated, e.g. a post can only be deleted once.
+
+    Args:
+        iterations: Number of requests that will be made to every endpoint.
+    """
+    owner = User.objects.create_user('benchmark', 'benchmark@example.com', PASSWORD)
+    profile = create_profile(owner)
+    owned = [create_post(owner, 'Owned %d' % i) for i in range(10)] + [create_post(owner, 'Disabled', active=False)]
+    deleted = [create_post(owner, 'Deleted %d' % i) for i in range(iterations)]
+    feed = list(Post.objects.filter(active=True).values_list('pk', flat=True)[:50])
+    commented = owned[0]
+    Comment.objects.bulk_create([Comment(post=commented, user=owner, body='Comment %d' % i) for i in range(20)])
+    disabled_comments = [Comment.objects.create(post=commented, user=owner, body='Disabled') for _ in range(iterations)]
+    logged_out = [AuthToken.objects.create(owner)[1] for _ in range(iterations)]
+    without_profile = [User.objects.create_user('benchmark-profile-%d' % i, password=PASSWORD) for i in range(iterations)]
+    without_profile_tokens = [AuthToken.objects.create(user)[1] for user in without_profile]
+
+    anonymous = APIClient()
+    authenticated = client(AuthToken.objects.create(owner)[1])
+    staff = client(AuthToken.objects.create(
+        User.objects.create_user('benchmark-staff', password=PASSWORD, is_staff=True))[1])
+    cycle = itertools.cycle(feed).__next__
+
+    return [
+        # posts/urls.py
+        Endpoint('GET /api/posts/', budget(PostViewSet, 'list'), lambda i: anonymous.get('/api/posts/')),
+        Endpoint('GET /api/posts/ (authenticated)', budget(PostViewSet, 'list', AUTHENTICATED),
+                 lambda i: authenticated.get('/api/posts/')),
+        Endpoint('POST /api/posts/', budget(PostViewSet, 'create', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/', post_data('Created %d' % i))),
+        Endpoint('GET /api/posts/search/', budget(PostViewSet, 'search'),
+                 lambda i: anonymous.get('/api/posts/search/', {'q': 'post %d' % i})),
+        Endpoint('GET /api/posts/stats/', budget(PostViewSet, 'stats'), lambda i: anonymous.get('/api/posts/stats/')),
+        Endpoint('GET /api/posts/leaderboard/', budget(PostViewSet, 'leaderboard'),
+                 lambda i: anonymous.get('/api/posts/leaderboard/')),
+        Endpoint('GET /api/posts/{pk}/', budget(PostViewSet, 'retrieve'),
+                 lambda i: anonymous.get('/api/posts/%d/' % cycle())),
+        Endpoint('PUT /api/posts/{pk}/', budget(PostViewSet, 'update', AUTHENTICATED),
+                 lambda i: authenticated.put('/api/posts/%d/' % owned[1].pk, post_data('Updated %d' % i))),
+        Endpoint('PATCH /api/posts/{pk}/', budget(PostViewSet, 'partial_update', AUTHENTICATED),
+                 lambda i: authenticated.patch('/api/posts/%d/' % owned[1].pk, {'title': 'Patched %d' % i})),
+        Endpoint('DELETE /api/posts/{pk}/', budget(PostViewSet, 'destroy', AUTHENTICATED),
+                 lambda i: authenticated.delete('/api/posts/%d/' % deleted[i].pk)),
+        Endpoint('GET /api/posts/{username}/active/', budget(PostViewSet, 'active'),
+                 lambda i: anonymous.get('/api/posts/benchmark/active/')),
+        Endpoint('GET /api/posts/{username}/disabled/', budget(PostViewSet, 'disabled', AUTHENTICATED),
+                 lambda i: authenticated.get('/api/posts/benchmark/disabled/')),
+        Endpoint('POST /api/posts/{pk}/toggle/', budget(PostViewSet, 'toggle', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/%d/toggle/' % owned[2].pk)),
+        Endpoint('POST /api/posts/{pk}/donate/', budget(PostViewSet, 'donate', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/%d/donate/' % owned[0].pk, {'amount': 100})),
+        Endpoint('POST /api/posts/{pk}/like/', budget(PostViewSet, 'like', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/%d/like/' % cycle())),
+        Endpoint('POST /api/posts/{pk}/removelike/', budget(PostViewSet, 'removelike', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/%d/removelike/' % cycle())),
+        Endpoint('POST /api/posts/{pk}/dislike/', budget(PostViewSet, 'dislike', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/%d/dislike/' % cycle())),
+        Endpoint('POST /api/posts/{pk}/removedislike/', budget(PostViewSet, 'removedislike', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/%d/removedislike/' % cycle())),
+        Endpoint('POST /api/posts/reactions/', budget(PostViewSet, 'reactions', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/reactions/', [
+                     {'post': cycle(), 'reaction': ('like', 'dislike', 'removelike', 'removedislike')[j % 4]}
+                     for j in range(20)
+                 ], format='json')),
+        Endpoint('GET /api/posts/{pk}/comment/', budget(PostViewSet, 'comment'),
+                 lambda i: anonymous.get('/api/posts/%d/comment/' % commented.pk)),
+        Endpoint('POST /api/posts/{pk}/comment/', budget(PostViewSet, 'comment', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/%d/comment/' % commented.pk, {'comment': 'Comment'})),
+        Endpoint('POST /api/posts/disablecomment/', budget(PostViewSet, 'disablecomment', AUTHENTICATED),
+                 lambda i: authenticated.post('/api/posts/disablecomment/', {'id': disabled_comments[i].pk})),
+        # The export is fetched with a single query, whichever its size. ExportAPI has no declared budget.
+        Endpoint('GET /api/export/{name}/', AUTHENTICATED + 1,
+                 lambda i: staff.get('/api/export/posts/', {'format': 'csv'})),
+
+        # accounts/urls.py, the views of knox and the APIViews have no declared budget.
+        Endpoint('POST /api/auth/register', 3, lambda i: anonymous.post('/api/auth/register', {
+            'username': 'benchmark-registered-%d' % i, 'email': 'registered@example.com', 'password': PASSWORD})),
+        Endpoint('POST /api/auth/login', 2, lambda i: anonymous.post('/api/auth/login', {
+            'username': 'benchmark', 'password': PASSWORD})),
+        Endpoint('GET /api/auth/user', 3, lambda i: authenticated.get('/api/auth/user')),
+        Endpoint('POST /api/auth/logout', 4, lambda i: client(logged_out[i]).post('/api/auth/logout')),
+        Endpoint('POST /api/profile/', budget(ProfileViewSet, 'create', AUTHENTICATED),
+                 lambda i: client(without_profile_tokens[i]).post(
+                     '/api/profile/', profile_data(without_profile[i]), format='json')),
+        Endpoint('GET /api/profile/{username}/', budget(ProfileViewSet, 'retrieve'),
+                 lambda i: anonymous.get('/api/profile/benchmark/')),
+        Endpoint('GET /api/profile/{username}/page/', budget(ProfileViewSet, 'page'),
+                 lambda i: anonymous.get('/api/profile/benchmark/page/')),
+        Endpoint('PATCH /api/profile/{pk}/', budget(ProfileViewSet, 'partial_update', AUTHENTICATED),
+                 lambda i: authenticated.patch('/api/profile/%d/' % profile.pk, {'city': 'City %d' % i})),
+    ]
+
+
+def budget(viewset, action, authentication=0):
+    """
+    Returns the query budget of a request to the action of the viewset.
+
+    Args:
+        viewset: The class of the viewset.
+        action: The name of the action.
+        authentication: The number of queries of the authentication of the request, AUTHENTICATED or 0.
+    """
+    return viewset.query_budgets[action] + authentication
+
+
+def client(token):
+    """
+    Returns a client authenticated with the token.
+    """
+    authenticated = APIClient()
+    authenticated.credentials(HTTP_AUTHORIZATION='Token %s' % token)
+    return authenticated
+
+
+async def asgi_get(application, path, query_string='', headers=()):
+    """
+    Makes a GET request to the ASGI application.
+
+    Args:
+        application: The ASGI application.
+        path: The path of the request.
+        query_string: The query string of the request.
+        headers: The headers of the request, as a list of (name, value) strings.
+
+    Returns:
+        A tuple of the status code, the headers as a dictionary and the body of the response.
+    """
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': query_string.encode('latin1'),
+        'scheme': 'http', 'server': ('testserver', 80),
+        'headers': [(b'host', b'testserver')] + [
+            (name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    start = messages[0]
+    headers = {name.decode('latin1'): value.decode('latin1') for name, value in start['headers']}
+    return start['status'], headers, b''.join(message.get('body', b'') for message in messages[1:])
+
+
+def create_post(owner, title, active=True):
+    return Post.objects.create(owner=owner, active=active, **post_data(title))
+
+
+def post_data(title):
+    return {'title': title, 'description': 'Description', 'due_date': '2030-01-01', 'required_amount': 1000}
+
+
+def create_profile(user):
+    data = profile_data(user)
+    del data['user']
+    return Profile.objects.create(user=user, **data)
+
+
+def profile_data(user):
+    return {
+        'user': user.pk, 'dob': '2000-01-01', 'phone': '9999999999', 'phone_alt': '9999999999', 'gender': 'F',
+        'is_student': False, 'workplace_name': 'Workplace', 'workplace_address': 'Address',
+        'address': 'Address', 'city': 'City', 'state': 'State', 'zipcode': '600001',
+    }
@@ -0,0 +1,185 @@
+import csv
+import json
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+from accounts.models import Profile
+from accounts.serializer import ProfileSerializer
+from .cache import FEED, invalidate_responses
+from .seed import bulk_insert
+from .serializer import PostSerializer
+from .stats import invalidate_totals
+
+# The bulk imports of the Posts and the Profiles of partner organizations.
+#
+# The rows are read one at a time from CSV or NDJSON files and handled in batches. Every row is validated with the
+# serializer of the API, as if it was posted to the API, and the valid rows of a batch are written with bulk inserts
+# in a single transaction. The users owning the rows are looked up by their username with one query per batch,
+# rather than with a query per row by the serializer. An invalid row is reported and skipped without failing
+# the rest of the import.
+#
+# The exports of posts/export.py can be imported, the read-only columns such as the ids are ignored.
+
+IMPORT_BATCH_SIZE = 1000
+
+
+class Importer:
+    """
+    Imports the rows of a model.
+
+    Args:
+        serializer_class: The serializer validating the rows.
+        user_field: The name of the field of the model referencing the User, which is read from the username
+            in the user_column of the rows.
+        user_column: The column of the rows holding the username.
+    """
+
+    def __init__(self, serializer_class, user_field, user_column):
+        self.serializer = serializer_class()
+        # The user is resolved by the importer instead.
+        self.serializer.fields.pop(user_field, None)
+        self.user_field = user_field
+        self.user_column = user_column
+        self.model = serializer_class.Meta.model
+
+    def users(self, rows):
+        """
+        Returns a dictionary of the usernames of the rows to the ids of the users.
+        """
+        usernames = set(row.get(self.user_column) for row in rows if row is not None) - {None}
+        return dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+
+    def validate(self, rows):
+        """
+        Validates a batch of rows.
+
+        Args:
+            rows: A list of (line, row) tuples, where line is the line of the row in the file.
+
+        Returns:
+            A tuple of the list of (line, instance) tuples of the valid rows and the list of (line, errors) tuples
+            of the invalid rows.
+        """
+        users = self.users([row for line, row in rows])
+        instances, errors = [], []
+        for line, row in rows:
+            if row is None:
+                errors.append((line, {'non_field_errors': ['Invalid JSON object.']}))
+                continue
+            try:
+                data = self.serializer.run_validation(row)
+                user_id = users.get(row.get(self.user_column))
+                if user_id is None:
+                    raise serializers.ValidationError({self.user_column: ['User does not exist.']})
+                self.check(user_id)
+            except serializers.ValidationError as error:
+                errors.append((line, error.detail))
+                continue
+            instances.append((line, self.model(**{'%s_id' % self.user_field: user_id}, **data)))
+        return instances, errors
+
+    def check(self, user_id):
+        """
+        Validates the row of the user against the rows already imported, raising a ValidationError if it is invalid.
+        """
+
+    def write(self, instances, batch_size):
+        """
+        Writes the valid instances of a batch.
+        """
+        bulk_insert(self.model, instances, batch_size)
+
+
+class PostImporter(Importer):
+
+    def __init__(self):
+        super().__init__(PostSerializer, 'owner', 'owner')
+
+    def write(self, instances, batch_size):
+        if not instances:
+            return
+        super().write(instances, batch_size)
+        # The imported Posts are added to the totals of the stats and to the feed.
+        transaction.on_commit(invalidate_totals)
+        transaction.on_commit(lambda: invalidate_responses(FEED))
+
+
+class ProfileImporter(Importer):
+    # A user has at most one Profile, so the rows of users who have a Profile are invalid.
+
+    def __init__(self):
+        super().__init__(ProfileSerializer, 'user', 'username')
+        self.profiled = set()
+
+    def validate(self, rows):
+        usernames = [row.get(self.user_column) for line, row in rows if row is not None]
+        self.profiled = set(Profile.objects.filter(user__username__in=usernames).values_list('user_id', flat=True))
+        return super().validate(rows)
+
+    def check(self, user_id):
+        if user_id in self.profiled:
+            raise serializers.ValidationError({self.user_column: ['The user already has a profile.']})
+        self.profiled.add(user_id)
+
+
+IMPORTERS = {
+    'posts': PostImporter,
+    'profiles': ProfileImporter,
+}
+
+
+def read_rows(file, format):
+    """
+    Yields the rows of a CSV or NDJSON file as (line, row) tuples, where row is a dictionary,
+    or None if the line is not a JSON object. The empty values of the CSV files are left out, like the fields missing from the body of a request.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, {column: value for column, value in row.items() if value != ''}
+        return
+    for line, text in enumerate(file, 1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else None
+
+
+def import_rows(importer, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validates and writes the rows in batches of batch_size rows, every batch in its own transaction.
+
+    Args:
+        importer: The Importer of the model.
+        rows: An iterable of (line, row) tuples, returned by read_rows.
+        batch_size: The number of rows validated and written at a time.
+
+    Yields:
+        A tuple of the number of rows imported and the list of (line, errors) tuples of the rows skipped,
+        for every batch.
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield import_batch(importer, batch, batch_size)
+            batch = []
+    if batch:
+        yield import_batch(importer, batch, batch_size)
+
+
+def import_batch(importer, rows, batch_size):
+    """
+    Validates a batch of rows and writes the valid rows in a single transaction.
+    """
+    valid, errors = importer.validate(rows)
+    try:
+        with transaction.atomic():
+            importer.write([instance for line, instance in valid], batch_size)
+    except DatabaseError as error:
+        # E.g. a profile created concurrently. The valid rows of the batch are rolled back and reported.
+        return 0, errors + [(line, {'non_field_errors': [str(error)]}) for line, instance in valid]
+    return len(valid), errors
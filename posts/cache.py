@@ -0,0 +1,194 @@
+import hashlib
+import json
+import uuid
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from jananihome.routers import read_database
+
+# Anonymous requests make up most of the read traffic and get the same response, so their responses
+# are cached and shared between them. Authenticated requests are never cached as their responses contain the
+# reactions of the user.
+#
+# The cached responses are grouped into scopes. The feed scope contains the lists of posts and every post has
+# a scope containing the post and its comments. Every scope has a generation which is a part of the cache key
+# of its responses. Invalidating a scope replaces its generation, so the old responses are never read again
+# and expire on their own. The responses are cached from the default database: a response read from a replica
+# lagging behind it could miss the change which invalidated the scope, and be cached in its new generation.
+
+CACHE_ALIAS = getattr(settings, 'POSTS_RESPONSE_CACHE_ALIAS', 'default')
+CACHE_TIMEOUT = getattr(settings, 'POSTS_RESPONSE_CACHE_TIMEOUT', 60)
+
+FEED = 'feed'
+
+
+def post_scope(pk):
+    """
+    Returns the scope of the cached responses of a single post.
+    """
+    return 'post:%s' % pk
+
+
+def get_generation(cache, scope):
+    """
+    Returns the current generation of the scope, creating it if it does not exist in the cache.
+    """
+    key = 'posts:generation:%s' % scope
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_responses(*scopes):
+    """
+    Invalidates the cached responses of the scopes.
+
+    Args:
+        scopes: The scopes to be invalidated. Either FEED or a scope returned by post_scope.
+    """
+    caches[CACHE_ALIAS].set_many({'posts:generation:%s' % scope: uuid.uuid4().hex for scope in scopes}, timeout=None)
+
+
+def content_etag(data):
+    """
+    Returns a strong ETag of the response data.
+    """
+    content = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode('utf-8')
+    return '"%s"' % hashlib.md5(content).hexdigest()
+
+
+# The representation of a Post only changes when modified_at changes, as the changes of the counters
+# also set modified_at. The counters and the reactions of the user are a part of the ETag nevertheless,
+# so that the ETag changes even if modified_at does not, e.g. when the user who requested it changes.
+
+def post_version(post):
+    """
+    Returns a string identifying the version of the representation of the Post.
+    The Post is either an instance or a row of a values() queryset with the required columns of PostListSerializer.
+    """
+    if isinstance(post, dict):
+        return '%s:%s:%s:%s:%s:%s:%s:%s' % (
+            post['id'], post['modified_at'].timestamp(), post['owner__username'] or '',
+            post['like_count'], post['dislike_count'], post['comment_count'],
+            post.get('user_liked', ''), post.get('user_disliked', ''))
+    return '%s:%s:%s:%s:%s:%s:%s:%s' % (
+        post.pk, post.modified_at.timestamp(), post.owner.username if post.owner_id else '',
+        post.like_count, post.dislike_count, post.comment_count,
+        getattr(post, 'user_liked', ''), getattr(post, 'user_disliked', ''))
+
+
+def posts_etag(posts, *extra):
+    """
+    Returns a weak ETag of the representation of the Posts, which can be computed before they are serialized.
+
+    Args:
+        posts: The Posts in the response.
+        extra: Anything else that changes the response, e.g. whether the page has a next page.
+    """
+    versions = [post_version(post) for post in posts] + [str(value) for value in extra]
+    return 'W/"%s"' % hashlib.md5('|'.join(versions).encode('utf-8')).hexdigest()
+
+
+def last_modified(post):
+    """
+    Returns the time of the last modification of the Post as a timestamp.
+    """
+    return int(post.modified_at.timestamp())
+
+
+def page_last_modified(posts):
+    """
+    Returns the time of the last modification of the Posts of a page as a timestamp, or None if the page is empty.
+    The Posts are rows of a values() queryset with the required columns of PostListSerializer.
+    """
+    # A Post leaving the page, e.g. when it is disabled, can leave a page last modified before the client's copy,
+    # so the conditional requests for pages are evaluated with their ETag alone.
+    if not posts:
+        return None
+    return int(max(post['modified_at'] for post in posts).timestamp())
+
+
+def not_modified(request, etag, modified=None):
+    """
+    Evaluates the conditional headers (If-None-Match, If-Modified-Since) of the request.
+
+    Args:
+        request: The request.
+        etag: The current ETag of the response.
+        modified: The timestamp of the last modification of the response, if known.
+
+    Returns:
+        A response with the status code of 304 (Not Modified) if the client has the current response, else None.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is not None:
+        set_validators(response, etag, modified)
+    return response
+
+
+def set_validators(response, etag, modified=None):
+    """
+    Sets the ETag and Last-Modified headers of the response.
+    """
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    # The response depends on the user who requested it.
+    response['Vary'] = 'Authorization'
+    return response
+
+
+def response_cache_key(cache, scope, request):
+    """
+    Returns the cache key of the response to the request in the current generation of the scope.
+    """
+    # The absolute URI contains the host, as the pagination links in the response are built from it.
+    return 'posts:response:%s:%s' % (
+        get_generation(cache, scope), hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest())
+
+
+def cache_anonymous_response(scope):
+    """
+    Decorates a GET endpoint of a viewset to cache and share its responses between anonymous requests.
+    The responses carry the ETag (and Last-Modified) set by the endpoint, or an ETag of the data if the endpoint
+    does not set one. Requests with matching conditional headers are answered with 304 (Not Modified) without the data.
+
+    Args:
+        scope: FEED, or a function returning the scope from the keyword arguments of the endpoint.
+
+    Returns:
+        The decorator.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(self, *args, **kwargs):
+            request = self.request
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(self, *args, **kwargs)
+
+            cache = caches[CACHE_ALIAS]
+            key = response_cache_key(cache, scope if isinstance(scope, str) else scope(kwargs), request)
+            cached = cache.get(key)
+            if cached is None:
+                token = read_database.set(None)
+                try:
+                    response = view(self, *args, **kwargs)
+                finally:
+                    read_database.reset(token)
+                if response.status_code != 200:
+                    return response
+                etag = response['ETag'] if response.has_header('ETag') else content_etag(response.data)
+                modified = parse_http_date_safe(response['Last-Modified']) if response.has_header('Last-Modified') else None
+                cached = (etag, modified, response.data)
+                cache.set(key, cached, timeout=CACHE_TIMEOUT)
+
+            etag, modified, data = cached
+            return not_modified(request, etag, modified) or set_validators(Response(data, status=200), etag, modified)
+        return wrapper
+    return decorator
@@ -0,0 +1,79 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from .models import Post, Donation
+from .stats import post_totals, update_totals, invalidate_totals
+
+# Every donation is recorded as a Donation and added to the collected_amount of its Post with an F() expression
+# in the same transaction, so concurrent donations never overwrite each other's increments.
+# A donation is identified by its key. Submitting a donation again with the same key is a no-op, which makes
+# retried requests and imports of overlapping payment exports safe.
+
+
+def donate(post_id, user, amount, key):
+    """
+    Records the donation of the user to the post, unless a donation with the same key has been recorded.
+
+    The collected amount is incremented before the Donation is inserted. As the first statement of the transaction
+    is a write, concurrent donations wait for each other's locks instead of deadlocking on SQLite.
+    If the key is taken, the insertion fails and the increment is rolled back.
+
+    Args:
+        post_id: Primary key of the post.
+        user: The user who donates.
+        amount: The amount donated.
+        key: The key identifying the donation.
+
+    Returns:
+        A tuple of the Donation and whether it was created by this call.
+
+    Raises:
+        Post.DoesNotExist: If the post does not exist or is disabled. Nothing is recorded in that case.
+    """
+    try:
+        with transaction.atomic():
+            updated = Post.objects.filter(pk=post_id, active=True).update(
+                collected_amount=F('collected_amount') + amount, modified_at=timezone.now())
+            if not updated:
+                raise Post.DoesNotExist('Post matching query does not exist.')
+            donation = Donation.objects.create(post_id=post_id, user=user, amount=amount, key=key)
+
+            post = Post.objects.only('active', 'required_amount', 'collected_amount').get(pk=post_id)
+            new = post_totals(post)
+            post.collected_amount -= amount
+            update_totals(post_totals(post), new)
+    except IntegrityError:
+        return Donation.objects.get(key=key), False
+    return donation, True
+
+
+def import_donations(donations):
+    """
+    Records a batch of donations in a single transaction, skipping the donations whose key has been recorded.
+
+    Args:
+        donations: A list of unsaved Donations of existing posts.
+
+    Returns:
+        The list of the Donations recorded.
+    """
+    with transaction.atomic():
+        recorded = set(Donation.objects.filter(key__in=[donation.key for donation in donations]).values_list('key', flat=True))
+        donations = [donation for donation in dict((donation.key, donation) for donation in donations).values()
+                     if donation.key not in recorded]
+        if not donations:
+            return []
+
+        # A concurrent import of the same donations fails the insertion and rolls back the whole batch.
+        Donation.objects.bulk_create(donations)
+        amounts = {}
+        for donation in donations:
+            amounts[donation.post_id] = amounts.get(donation.post_id, 0) + donation.amount
+        Post.objects.filter(pk__in=amounts).update(
+            collected_amount=F('collected_amount') + Case(
+                *[When(pk=pk, then=Value(amount)) for pk, amount in amounts.items()],
+                default=Value(0), output_field=IntegerField()),
+            modified_at=timezone.now(),
+        )
+        transaction.on_commit(invalidate_totals)
+    return donations
@@ -0,0 +1,182 @@
+import csv
+import json
+from datetime import date, datetime, timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import renderers
+from accounts.models import Profile
+from .models import Post, Comment, Like, Dislike, Donation
+
+# The full dumps of the tables for reporting.
+#
+# The rows are read with QuerySet.iterator(), which fetches them in chunks (with a server-side cursor on PostgreSQL)
+# instead of loading the whole table, and are encoded one at a time. The exports are generators of lines,
+# so the memory used does not grow with the size of the tables, whether they are written to a file
+# or streamed in a response.
+#
+# An export can be limited to the rows changed since a watermark. The Posts and the Profiles are filtered by their
+# modified_at. The reactions, the comments and the donations have no modified_at, but every change of them also
+# updates the modified_at of their Post, so they are filtered by the modified_at of their Post.
+#
+# The modified_at of a row is set before its transaction commits, so a row can be committed after an export started
+# with a modified_at older than the start of the export, and be missing from it. The watermark of the next export is
+# the time the export started minus EXPORT_WATERMARK_MARGIN, which must exceed the duration of the longest
+# transaction writing the rows, so that such rows are exported next time. The rows changed within the margin are
+# exported twice, so the exports are imported by their ids.
+# The rows deleted since the watermark are not part of an incremental export, which a full export reconciles.
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_WATERMARK_MARGIN = timedelta(seconds=getattr(settings, 'EXPORT_WATERMARK_MARGIN', 300))
+
+class Export:
+    """
+    The columns of an exported table.
+
+    Args:
+        queryset: A function returning the queryset of the rows.
+        columns: A list of (name, lookup) tuples, where the lookup is passed to QuerySet.values_list.
+        watermark: The lookup of the modification time of the rows.
+    """
+
+    def __init__(self, queryset, columns, watermark):
+        self.queryset = queryset
+        self.columns = columns
+        self.watermark = watermark
+
+    def rows(self, since=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Yields the rows of the table as tuples, ordered by their primary key.
+
+        Args:
+            since: If given, only the rows modified at or after this time are yielded.
+            chunk_size: The number of rows fetched from the database at a time.
+        """
+        queryset = self.queryset()
+        if since is not None:
+            queryset = queryset.filter(**{'%s__gte' % self.watermark: since})
+        lookups = [lookup for name, lookup in self.columns]
+        return queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+EXPORTS = {
+    'posts': Export(Post.objects.all, [
+        ('id', 'id'), ('owner', 'owner__username'), ('title', 'title'), ('description', 'description'),
+        ('due_date', 'due_date'), ('active', 'active'), ('verified', 'verified'), ('verified_at', 'verified_at'),
+        ('required_amount', 'required_amount'), ('collected_amount', 'collected_amount'), ('likes', 'like_count'),
+        ('dislikes', 'dislike_count'), ('comments', 'comment_count'), ('created_at', 'created_at'),
+        ('modified_at', 'modified_at'),
+    ], 'modified_at'),
+    'comments': Export(Comment.objects.all, [
+        ('id', 'id'), ('post', 'post_id'), ('user', 'user__username'), ('body', 'body'), ('disabled', 'disabled'),
+        ('created_at', 'created_at'),
+    ], 'post__modified_at'),
+    'likes': Export(Like.objects.all, [
+        ('id', 'id'), ('post', 'post_id'), ('user', 'user__username'),
+    ], 'post__modified_at'),
+    'dislikes': Export(Dislike.objects.all, [
+        ('id', 'id'), ('post', 'post_id'), ('user', 'user__username'),
+    ], 'post__modified_at'),
+    'donations': Export(Donation.objects.all, [
+        ('id', 'id'), ('post', 'post_id'), ('user', 'user__username'), ('amount', 'amount'),
+        ('created_at', 'created_at'),
+    ], 'post__modified_at'),
+    'profiles': Export(Profile.objects.all, [
+        ('id', 'id'), ('user', 'user__username'), ('dob', 'dob'), ('phone', 'phone'), ('phone_alt', 'phone_alt'),
+        ('gender', 'gender'), ('is_student', 'is_student'), ('workplace_name', 'workplace_name'),
+        ('workplace_address', 'workplace_address'), ('address', 'address'), ('city', 'city'), ('state', 'state'),
+        ('zipcode', 'zipcode'), ('modified_at', 'modified_at'),
+    ], 'modified_at'),
+}
+
+
+def encode_value(value):
+    """
+    Encodes the dates and times in ISO 8601, like the API.
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class Echo:
+    """
+    A file-like object returning what is written to it, so that csv.writer encodes a row at a time.
+    """
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    Renders the responses of the export endpoint which are not streamed, i.e. the errors, as NDJSON.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(row) + '\n' for row in rows).encode('utf-8')
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """
+    Renders the responses of the export endpoint which are not streamed, i.e. the errors, as CSV.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b''
+        writer = csv.writer(Echo(), lineterminator='\n')
+        lines = [writer.writerow(rows[0].keys())] + [writer.writerow(row.values()) for row in rows]
+        return ''.join(lines).encode('utf-8')
+
+
+def export_lines(name, format='ndjson', since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the lines of the export of the table, each ending with a newline.
+
+    Args:
+        name: The name of the table, a key of EXPORTS.
+        format: Either 'ndjson', a JSON object per row, or 'csv', with a header row.
+        since: If given, only the rows modified at or after this time are exported.
+        chunk_size: The number of rows fetched from the database at a time.
+    """
+    export = EXPORTS[name]
+    names = [column for column, lookup in export.columns]
+    rows = export.rows(since, chunk_size)
+    if format == 'csv':
+        writer = csv.writer(Echo(), lineterminator='\n')
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow([encode_value(value) for value in row])
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(names, map(encode_value, row)))) + '\n'
+
+
+def export_watermark():
+    """
+    Returns the watermark of the export starting now, to be passed as the since of the next export.
+    """
+    return timezone.now() - EXPORT_WATERMARK_MARGIN
+
+
+def parse_since(value):
+    """
+    Parses the watermark of an incremental export, an ISO 8601 date and time.
+    Times without a timezone are in the current timezone.
+
+    Raises:
+        ValueError: If the value is not a date and time.
+    """
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError('%r is not a date and time.' % value)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
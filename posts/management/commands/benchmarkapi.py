@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks every endpoint of the API on a seeded test database and reports the latency, '
+            'the number of queries and the size of the responses. Fails if an endpoint exceeds its query budget.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--reactions', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--iterations', type=int, default=20,
+                            help='Number of requests made to every endpoint.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the benchmark on a test database, which is created for the run and destroyed afterwards.
+        Use the jananihome.sqlite_settings settings module to run it locally on SQLite.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        # The replicas read from the test database, like in the tests.
+        for alias in connections:
+            mirror = connections[alias].settings_dict['TEST']['MIRROR']
+            if mirror:
+                connections[alias].creation.set_as_test_mirror(connections[mirror].settings_dict)
+        try:
+            results = benchmark.run(
+                users=options['users'], posts=options['posts'], reactions=options['reactions'],
+                comments=options['comments'], iterations=options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write('%-42s %9s %9s %8s %7s %10s' % ('Endpoint', 'p50 (ms)', 'p95 (ms)', 'Queries', 'Budget', 'Size (B)'))
+        for result in results:
+            line = '%-42s %9.2f %9.2f %8d %7d %10d' % (
+                result.name, result.p50, result.p95, result.queries, result.budget, result.size)
+            self.stdout.write(self.style.ERROR(line) if result.queries > result.budget else line)
+
+        exceeded = benchmark.over_budget(results)
+        if exceeded:
+            raise CommandError('%d endpoints exceeded their query budget: %s' % (
+                len(exceeded), ', '.join(result.name for result in exceeded)))
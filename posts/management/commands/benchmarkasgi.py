@@ -0,0 +1,166 @@
+import asyncio
+import io
+import itertools
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment, teardown_test_environment
+from knox.models import AuthToken
+from posts import benchmark
+from posts.models import Post
+from posts.seed import seed
+
+
+class Command(BaseCommand):
+    help = ('Compares the throughput and the latency of the read endpoints served by WSGI and by the ASGI handler '
+            'of Django under concurrent load, on a seeded test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--reactions', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests made to every server.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Number of concurrent clients.')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Number of WSGI workers, i.e. the number of requests served at the same time by WSGI.')
+        parser.add_argument('--threads', type=int, default=32,
+                            help='Number of threads of the thread pool running the views under ASGI.')
+        parser.add_argument('--latency', type=float, default=5,
+                            help='Milliseconds added to every query, simulating the round trip to a database server.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the benchmark on a test database, which is created for the run and destroyed afterwards.
+        Use the jananihome.sqlite_settings settings module to run it locally on SQLite.
+        Authenticated requests are made, so that the responses are not served from the response cache.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user_ids, post_ids = seed(
+                users=options['users'], posts=options['posts'], reactions=options['reactions'],
+                comments=options['comments'], prefix='benchmark')
+            post_ids = list(Post.objects.filter(pk__in=post_ids, active=True).values_list('pk', flat=True))
+            usernames = list(User.objects.filter(pk__in=user_ids).values_list('username', flat=True))
+            token = AuthToken.objects.create(User.objects.get(pk=user_ids[0]))[1]
+
+            generator = random.Random(0)
+            paths = list(itertools.islice(itertools.cycle([
+                lambda: '/api/posts/',
+                lambda: '/api/posts/%d/' % generator.choice(post_ids),
+                lambda: '/api/posts/%d/comment/' % generator.choice(post_ids),
+                lambda: '/api/posts/%s/active/' % generator.choice(usernames),
+            ]), options['requests']))
+            paths = [path() for path in paths]
+            headers = [('Authorization', 'Token %s' % token)]
+
+            with simulated_latency(options['latency'] / 1000):
+                results = [
+                    ('WSGI (%d workers)' % options['workers'], self.run_wsgi(paths, headers, options)),
+                    ('ASGI (Django handler)', self.run_asgi(ASGIHandler(), paths, headers, options)),
+                ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write('%-32s %12s %9s %9s' % ('Server', 'Requests/s', 'p50 (ms)', 'p95 (ms)'))
+        for name, (throughput, timings) in results:
+            self.stdout.write('%-32s %12.1f %9.2f %9.2f' % (
+                name, throughput, statistics.median(timings), benchmark.percentile(timings, 95)))
+
+    def run_wsgi(self, paths, headers, options):
+        """
+        Makes the requests to the WSGI handler from concurrent clients.
+        The requests are queued and served by --workers threads, like by a WSGI server with that many workers.
+
+        Returns:
+            A tuple of the throughput in requests per second and the latencies of the requests in milliseconds.
+        """
+        handler = WSGIHandler()
+        workers = ThreadPoolExecutor(max_workers=options['workers'])
+        environ_headers = {'HTTP_%s' % name.upper().replace('-', '_'): value for name, value in headers}
+
+        def serve(path):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'testserver', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+                'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': True,
+                'wsgi.multiprocess': False, 'wsgi.run_once': False,
+            }
+            environ.update(environ_headers)
+            response = handler(environ, lambda status, response_headers: None)
+            b''.join(response)
+            response.close()
+
+        def request(path):
+            start = time.perf_counter()
+            workers.submit(serve, path).result()
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with workers, ThreadPoolExecutor(max_workers=options['concurrency']) as clients:
+            timings = list(clients.map(request, paths))
+        return len(paths) / (time.perf_counter() - start), timings
+
+    def run_asgi(self, application, paths, headers, options):
+        """
+        Makes the requests to the ASGI application from concurrent clients on a single event loop.
+
+        Returns:
+            A tuple of the throughput in requests per second and the latencies of the requests in milliseconds.
+        """
+        async def run():
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=options['threads']))
+            pending = iter(paths)
+            timings = []
+
+            async def client():
+                for path in pending:
+                    start = time.perf_counter()
+                    await benchmark.asgi_get(application, path, headers=headers)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            await asyncio.gather(*[client() for _ in range(options['concurrency'])])
+            return len(paths) / (time.perf_counter() - start), timings
+        return async_to_sync(run)()
+
+
+class simulated_latency:
+    """
+    Delays every query by the latency, on the existing connection and on the connections created
+    by other threads, as if the database was reached over the network.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def delay(self, execute, sql, params, many, context):
+        time.sleep(self.latency)
+        return execute(sql, params, many, context)
+
+    def add(self, sender, connection, **kwargs):
+        connection.execute_wrappers.append(self.delay)
+
+    def __enter__(self):
+        connection_created.connect(self.add)
+        connection.execute_wrappers.append(self.delay)
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self.add)
+        connection.execute_wrappers.remove(self.delay)
@@ -0,0 +1,103 @@
+import io
+import statistics
+import sys
+import time
+from django.contrib.auth.models import User
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment, teardown_test_environment
+from knox.models import AuthToken
+from posts import benchmark
+from posts.models import Post
+from posts.seed import seed
+
+
+class Command(BaseCommand):
+    help = ('Compares the latency of the requests served by WSGI with a new connection to the database for every '
+            'request, and with persistent connections with and without health checks, on a seeded test database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=500, help='Number of requests made in every mode.')
+        parser.add_argument('--max-age', type=int, default=60, help='CONN_MAX_AGE of the persistent connections.')
+        parser.add_argument('--connect-latency', type=float, default=5,
+                            help='Milliseconds added to the opening of every connection, simulating the handshake '
+                                 'and the authentication with a database server. Use 0 on a database server.')
+
+    def handle(self, *args, **options):
+        """
+        Runs the benchmark on a test database, which is created for the run and destroyed afterwards.
+        Use the jananihome.sqlite_settings settings module to run it locally on SQLite.
+        Authenticated requests are made, so that the responses are not served from the response cache.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        settings_dict = dict(connection.settings_dict)
+        try:
+            user_ids, post_ids = seed(users=1, posts=options['posts'], reactions=0, comments=0, prefix='benchmark')
+            post_ids = list(Post.objects.filter(pk__in=post_ids, active=True).values_list('pk', flat=True))
+            token = AuthToken.objects.create(User.objects.get(pk=user_ids[0]))[1]
+            paths = ['/api/posts/%d/' % post_ids[i % len(post_ids)] for i in range(options['requests'])]
+
+            results = [
+                ('New connection per request', self.run(paths, token, options, max_age=0, health_checks=False)),
+                ('Persistent connections', self.run(paths, token, options, max_age=options['max_age'],
+                                                    health_checks=False)),
+                ('Persistent connections, health checks', self.run(paths, token, options,
+                                                                   max_age=options['max_age'], health_checks=True)),
+            ]
+        finally:
+            connection.settings_dict.update(settings_dict)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write('%-40s %9s %9s %12s' % ('Connections', 'p50 (ms)', 'p95 (ms)', 'Connections'))
+        for name, (timings, connections) in results:
+            self.stdout.write('%-40s %9.2f %9.2f %12d' % (
+                name, statistics.median(timings), benchmark.percentile(timings, 95), connections))
+
+    def run(self, paths, token, options, max_age, health_checks):
+        """
+        Makes the requests one after the other to a WSGI handler, which opens and closes the connections
+        like under a WSGI server.
+
+        Returns:
+            A tuple of the latencies of the requests in milliseconds and the number of connections opened.
+        """
+        connection.close()
+        connection.settings_dict.update(CONN_MAX_AGE=max_age, CONN_HEALTH_CHECKS=health_checks)
+        # The handler is created after the settings are changed, which enable ConnectionHealthCheckMiddleware.
+        handler = WSGIHandler()
+        opened = []
+
+        def connected(sender, connection, **kwargs):
+            opened.append(connection)
+            time.sleep(options['connect_latency'] / 1000)
+
+        timings = []
+        connection_created.connect(connected)
+        try:
+            for path in paths:
+                environ = {
+                    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                    'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                    'HTTP_HOST': 'testserver', 'HTTP_AUTHORIZATION': 'Token %s' % token,
+                    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+                    'wsgi.version': (1, 0), 'wsgi.multithread': False, 'wsgi.multiprocess': False,
+                    'wsgi.run_once': False,
+                }
+                start = time.perf_counter()
+                response = handler(environ, lambda status, response_headers: None)
+                b''.join(response)
+                # Closing the response ends the request, which closes the connection unless it is persistent.
+                response.close()
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            connection_created.disconnect(connected)
+        return timings, len(opened)
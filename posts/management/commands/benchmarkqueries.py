@@ -0,0 +1,113 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from posts.models import Post, Like, Dislike, Comment
+from posts.search import search_posts
+from posts.seed import seed
+
+
+class Rollback(Exception):
+    """
+    Raised to roll back the seeded data at the end of the benchmark.
+    """
+
+
+class Command(BaseCommand):
+    help = ('Seeds a large dataset and reports the query plans and timings of the hot queries of the posts API. '
+            'The seeded data is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--reactions', type=int, default=200000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Number of times every query is run.')
+        parser.add_argument('--compare', action='store_true',
+                            help='Also report the plans and timings without the indexes of the posts models.')
+
+    def handle(self, *args, **options):
+        """
+        Seeds the dataset and benchmarks the hot queries with the indexes, and optionally without them.
+        Everything runs in a transaction that is rolled back, so the database is left unchanged.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        try:
+            with transaction.atomic():
+                self.stdout.write('Seeding the database...')
+                user_ids, post_ids = seed(
+                    users=options['users'], posts=options['posts'],
+                    reactions=options['reactions'], comments=options['comments'], prefix='benchmark')
+                # The statistics of the tables are refreshed, so that the planner knows about the seeded rows.
+                if connection.vendor in ('postgresql', 'sqlite'):
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+
+                queries = self.hot_queries(user_ids[0], post_ids[0])
+                if options['compare']:
+                    self.stdout.write(self.style.MIGRATE_HEADING('\nWithout the indexes'))
+                    indexes = self.remove_indexes()
+                    self.benchmark(queries, options['repeat'])
+                    self.restore_indexes(indexes)
+                self.stdout.write(self.style.MIGRATE_HEADING('\nWith the indexes'))
+                self.benchmark(queries, options['repeat'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def hot_queries(self, user_id, post_id):
+        """
+        Returns the hot queries of the posts API, built the same way as in posts/api.py.
+        """
+        posts = Post.objects.select_related('owner')
+        return {
+            'feed page': posts.filter(active=True).with_reactions(None).order_by('-created_at', '-id')[:20],
+            'active posts of a user': posts.filter(active=True, owner_id=user_id).order_by('-created_at', '-id'),
+            'disabled posts of a user': posts.filter(active=False, owner_id=user_id).order_by('-created_at', '-id'),
+            'comments of a post': Comment.objects.filter(post_id=post_id, disabled=False).select_related('user')
+                .order_by('created_at', 'id')[:50],
+            # Every seeded Post matches the common term, which is the worst case of the ranking.
+            'search for a rare term': search_posts(Post.objects.filter(active=True), 'post 42')[:20],
+            'search for a common term': search_posts(Post.objects.filter(active=True), 'post')[:20],
+        }
+
+    def benchmark(self, queries, repeat):
+        """
+        Reports the query plan and the median and the maximum time of every query.
+        """
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(self.style.SQL_TABLE(name))
+            self.stdout.write('  median %.2f ms, max %.2f ms' % (statistics.median(timings), max(timings)))
+            for line in queryset.explain().splitlines():
+                self.stdout.write('  ' + line)
+
+    def remove_indexes(self):
+        """
+        Drops the indexes declared in the Meta of the posts models.
+
+        Returns:
+            A list of the (model, index) pairs that were dropped.
+        """
+        indexes = [(model, index) for model in (Post, Like, Dislike, Comment) for index in model._meta.indexes]
+        # The schema editor is not used as a context manager, which SQLite does not allow inside a transaction.
+        editor = connection.schema_editor()
+        for model, index in indexes:
+            editor.remove_index(model, index)
+        return indexes
+
+    def restore_indexes(self, indexes):
+        """
+        Recreates the indexes dropped by remove_indexes.
+        """
+        editor = connection.schema_editor()
+        for model, index in indexes:
+            editor.add_index(model, index)
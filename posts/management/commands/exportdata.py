@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from posts.export import EXPORTS, EXPORT_CHUNK_SIZE, export_lines, export_watermark, parse_since
+
+
+class Command(BaseCommand):
+    help = ('Exports a table (%s) as NDJSON or CSV. The rows are fetched in chunks and written as they are read, '
+            'so the memory used does not depend on the size of the table.' % ', '.join(EXPORTS))
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=list(EXPORTS))
+        parser.add_argument('--format', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument('--output', help='Path of the file written. Defaults to the standard output.')
+        parser.add_argument('--since', help='Only exports the rows changed at or after this ISO 8601 date and time, '
+                                            'e.g. the watermark reported by the previous export.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Number of rows fetched from the database at a time.')
+
+    def handle(self, *args, **options):
+        """
+        Writes the export of the table and reports the watermark of the next incremental export on the standard error.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        try:
+            since = parse_since(options['since']) if options['since'] else None
+        except ValueError as error:
+            raise CommandError(error)
+
+        watermark = export_watermark()
+        lines = export_lines(options['table'], options['format'], since, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='') as file:
+                rows = self.write(lines, file)
+        else:
+            rows = self.write(lines, self.stdout)
+        if options['format'] == 'csv':
+            rows -= 1
+        self.stderr.write('Exported %d rows. Watermark: %s' % (rows, watermark.isoformat()), style_func=self.style.SUCCESS)
+
+    def write(self, lines, file):
+        """
+        Writes the lines to the file and returns the number of lines written.
+        """
+        count = 0
+        for line in lines:
+            file.write(line)
+            count += 1
+        return count
@@ -0,0 +1,44 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from posts.bulkimport import IMPORTERS, IMPORT_BATCH_SIZE, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Imports posts or profiles from a CSV or NDJSON file. The rows are validated like the requests to the API '
+            'and written in batches. The invalid rows are reported on the standard error and skipped.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=list(IMPORTERS))
+        parser.add_argument('path', help='Path of the file. The posts are owned by the user of the owner column, '
+                                         'the profiles belong to the user of the username column.')
+        parser.add_argument('--format', choices=['ndjson', 'csv'],
+                            help='Format of the file. Defaults to the extension of the file.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help='Number of rows validated and written per transaction.')
+
+    def handle(self, *args, **options):
+        """
+        Imports the rows of the file batch by batch, so that the file is never loaded at once.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        format = options['format'] or ('csv' if options['path'].endswith('.csv') else 'ndjson')
+        importer = IMPORTERS[options['table']]()
+        imported, skipped = 0, 0
+        start = time.perf_counter()
+        try:
+            with open(options['path'], newline='') as file:
+                for count, errors in import_rows(importer, read_rows(file, format), options['batch_size']):
+                    imported += count
+                    skipped += len(errors)
+                    for line, error in errors:
+                        self.stderr.write('Line %s: %s' % (line, json.dumps(error)))
+        except OSError as error:
+            raise CommandError(error)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS('Imported %d %s in %.2fs (%.0f rows/s), skipped %d invalid rows.' % (
+            imported, options['table'], elapsed, imported / elapsed if elapsed else 0, skipped)))
@@ -0,0 +1,78 @@
+import csv
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from posts.donations import import_donations
+from posts.models import Post, Donation
+from posts.serializer import MAX_DONATION_AMOUNT
+
+# The ids of the payments are recorded in the keys of the Donations, after the 'payment:' prefix.
+MAX_PAYMENT_ID_LENGTH = Donation._meta.get_field('key').max_length - len('payment:')
+
+
+class Command(BaseCommand):
+    help = ('Imports the donations of a CSV export of the payment provider with the columns payment_id, post_id, '
+            'amount and optionally username. Importing the same payments again is a no-op.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the CSV file.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of donations recorded per transaction.')
+
+    def handle(self, *args, **options):
+        """
+        Records the donations of the CSV file in batches. Every batch is recorded in a single transaction,
+        so an interrupted import can be run again from the start.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        counts = {'imported': 0, 'duplicates': 0, 'skipped': 0}
+        try:
+            with open(options['path'], newline='') as file:
+                reader = csv.DictReader(file)
+                missing = {'payment_id', 'post_id', 'amount'} - set(reader.fieldnames or ())
+                if missing:
+                    raise CommandError('The CSV file has no %s column.' % ', '.join(sorted(missing)))
+
+                batch = []
+                for row in reader:
+                    batch.append(row)
+                    if len(batch) == options['batch_size']:
+                        self.import_batch(batch, counts)
+                        batch = []
+                if batch:
+                    self.import_batch(batch, counts)
+        except OSError as error:
+            raise CommandError(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %(imported)d donations, %(duplicates)d were already recorded, %(skipped)d were invalid.' % counts))
+
+    def import_batch(self, rows, counts):
+        """
+        Records the donations of a batch of rows, skipping the rows of unknown posts, invalid amounts
+        and invalid payment ids.
+        The posts and the users of the batch are fetched with a query each.
+        """
+        post_ids = set(Post.objects.filter(
+            pk__in=[row['post_id'] for row in rows if row['post_id'].isdigit()]).values_list('pk', flat=True))
+        users = dict(User.objects.filter(
+            username__in=[row.get('username') for row in rows if row.get('username')]).values_list('username', 'pk'))
+
+        donations = []
+        for row in rows:
+            amount = row['amount'].strip()
+            payment_id = row['payment_id'] or ''
+            if (not row['post_id'].isdigit() or int(row['post_id']) not in post_ids
+                    or not amount.isdigit() or not 0 < int(amount) <= MAX_DONATION_AMOUNT
+                    or not 0 < len(payment_id) <= MAX_PAYMENT_ID_LENGTH):
+                counts['skipped'] += 1
+                continue
+            donations.append(Donation(
+                post_id=int(row['post_id']), user_id=users.get(row.get('username')), amount=int(amount),
+                key='payment:%s' % payment_id))
+
+        imported = len(import_donations(donations))
+        counts['imported'] += imported
+        counts['duplicates'] += len(donations) - imported
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the like_count, dislike_count and comment_count of the Posts from the Like, Dislike and Comment rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of Post ids updated per transaction.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the number of Posts with stale counters.')
+
+    def handle(self, *args, **options):
+        """
+        Repairs the reaction and comment counters of every Post.
+        The Posts are updated in ranges of ids, so that a single transaction does not lock the whole table.
+
+        Args:
+            self: Represents the instance of the class.
+            options: The parsed command line options.
+        """
+        stale = Post.objects.with_stale_counters().count()
+        self.stdout.write('%d posts have stale counters.' % stale)
+        if options['dry_run'] or not stale:
+            return
+
+        bounds = Post.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        batch_size = options['batch_size']
+        repaired = 0
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            with transaction.atomic():
+                batch = Post.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+                ids = list(batch.with_stale_counters().values_list('pk', flat=True))
+                repaired += Post.objects.filter(pk__in=ids).recount_counters()
+        self.stdout.write(self.style.SUCCESS('Repaired the counters of %d posts.' % repaired))
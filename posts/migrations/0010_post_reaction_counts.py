@@ -0,0 +1,36 @@
+# Generated by Django 3.0.14 on 2026-10-18 07:52
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_reactions(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    counts = {}
+    for name in ('Like', 'Dislike'):
+        reactions = apps.get_model('posts', name).objects.filter(post=OuterRef('pk')).order_by()
+        reactions = reactions.values('post').annotate(count=Count('pk')).values('count')
+        counts[name] = Coalesce(Subquery(reactions, output_field=IntegerField()), 0)
+    Post.objects.update(like_count=counts['Like'], dislike_count=counts['Dislike'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_comment_disabled'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='dislike_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_reactions, migrations.RunPython.noop),
+    ]
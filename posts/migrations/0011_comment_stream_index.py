@@ -0,0 +1,17 @@
+# Generated by Django 3.0.14 on 2026-10-18 07:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_reaction_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'disabled', 'created_at'], name='comment_stream_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+from posts.search import create_search_index, drop_search_index
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_hot_path_indexes'),
+    ]
+
+    # The search index depends on the database, a GIN index on PostgreSQL and an FTS5 table on SQLite.
+    # See posts/search.py.
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
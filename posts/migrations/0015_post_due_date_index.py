@@ -0,0 +1,17 @@
+# Generated by Django 3.0.14 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(active=True), fields=['due_date'], name='post_due_date_idx'),
+        ),
+    ]
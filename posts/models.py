@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 # A model is the single, definitive source of information about your data. 
@@ -7,6 +10,66 @@ from django.contrib.auth.models import User
 # Generally, each model maps to a single database table.
 
 
+class PostQuerySet(models.QuerySet):
+
+	def with_reactions(self, user=None):
+		"""
+		Annotates whether the user has liked or disliked every Post as user_liked and user_disliked.
+		The annotations are Exists subqueries, so the Posts along with the user's reactions are fetched in a single query.
+		The number of likes and dislikes are read from the like_count and dislike_count columns.
+
+		Args:
+			self: Represents the instance of the class.
+			user: The user whose reactions are annotated. Anonymous users are skipped.
+
+		Returns:
+			The annotated queryset.
+		"""
+		if user is not None and user.is_authenticated:
+			return self.annotate(
+				user_liked=Exists(Like.objects.filter(post=OuterRef('pk'), user=user)),
+				user_disliked=Exists(Dislike.objects.filter(post=OuterRef('pk'), user=user)),
+			)
+		return self
+
+	def with_stale_counters(self):
+		"""
+		Filters the Posts whose like_count, dislike_count or comment_count does not match the Like, Dislike and Comment rows.
+		"""
+		return self.annotate(
+			actual_likes=related_count(Like.objects.all()),
+			actual_dislikes=related_count(Dislike.objects.all()),
+			actual_comments=related_count(Comment.objects.filter(disabled=False)),
+		).exclude(
+			like_count=F('actual_likes'),
+			dislike_count=F('actual_dislikes'),
+			comment_count=F('actual_comments'),
+		)
+
+	def recount_counters(self):
+		"""
+		Recomputes like_count, dislike_count and comment_count of the Posts from the Like, Dislike and Comment rows
+		in a single UPDATE.
+
+		Returns:
+			The number of Posts updated.
+		"""
+		return self.update(
+			like_count=related_count(Like.objects.all()),
+			dislike_count=related_count(Dislike.objects.all()),
+			comment_count=related_count(Comment.objects.filter(disabled=False)),
+			modified_at=timezone.now(),
+		)
+
+
+def related_count(queryset):
+	"""
+	Returns a subquery counting the rows of the queryset (of Like, Dislike or Comment) that belong to the outer Post.
+	"""
+	rows = queryset.filter(post=OuterRef('pk')).order_by().values('post').annotate(count=Count('pk'))
+	return Coalesce(Subquery(rows.values('count'), output_field=IntegerField()), 0)
+
+
 class Post(models.Model):
 	owner = models.ForeignKey(User, related_name='posts', on_delete=models.CASCADE, null=True)
 	title = models.CharField(max_length=150)
@@ -19,6 +82,24 @@ class Post(models.Model):
 	created_at = models.DateTimeField(auto_now_add=True)
 	required_amount = models.PositiveIntegerField()
 	collected_amount = models.PositiveIntegerField(default=0)
+	# The number of likes, dislikes and enabled comments are denormalized to avoid counting them on every read.
+	# They are updated atomically along with the reactions and comments, which also sets modified_at.
+	# See PostQuerySet.recount_counters to repair them.
+	like_count = models.PositiveIntegerField(default=0)
+	dislike_count = models.PositiveIntegerField(default=0)
+	comment_count = models.PositiveIntegerField(default=0)
+
+	objects = PostQuerySet.as_manager()
+
+	class Meta:
+		indexes = [
+			# Serves the feed, which pages through the active Posts from the newest to the oldest.
+			models.Index(fields=['-created_at', '-id'], condition=models.Q(active=True), name='post_feed_idx'),
+			# Serves the active and disabled Posts of a user.
+			models.Index(fields=['owner', 'active', '-created_at', '-id'], name='post_owner_active_idx'),
+			# Serves the leaderboard of the Posts nearing their due date.
+			models.Index(fields=['due_date'], condition=models.Q(active=True), name='post_due_date_idx'),
+		]
 
 class Like(models.Model):
 	post = models.ForeignKey(Post, related_name='like', on_delete=models.CASCADE, null=True)
@@ -42,4 +123,20 @@ class Comment(models.Model):
 	user = models.ForeignKey(User, related_name='comment', on_delete=models.CASCADE, null=True)
 	body = models.CharField(max_length=200)
 	disabled = models.BooleanField(default=False)
-	created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		indexes = [
+			# Serves the paginated stream of the enabled Comments of a Post.
+			models.Index(fields=['post', 'disabled', 'created_at'], name='comment_stream_idx'),
+		]
+
+
+class Donation(models.Model):
+	post = models.ForeignKey(Post, related_name='donations', on_delete=models.CASCADE)
+	user = models.ForeignKey(User, related_name='donations', on_delete=models.SET_NULL, null=True)
+	amount = models.PositiveIntegerField()
+	# Identifies the donation, so that a donation is recorded once however many times it is submitted.
+	# Either the Idempotency-Key of the request scoped to the user, or the id of the payment of an imported donation.
+	key = models.CharField(max_length=100, unique=True)
+	created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Cursor based pagination keeps the cost of every page constant. Instead of counting the whole table and
+# skipping rows with OFFSET, the position of the last row of the page is encoded in an opaque cursor
+# and the next page is fetched by filtering on the ordering fields.
+
+
+class PostCursorPagination(CursorPagination):
+    """
+    Paginates the Post feed from the newest Post to the oldest.
+    The id is used as the tie breaker for Posts created at the same instant.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class CommentCursorPagination(CursorPagination):
+    """
+    Paginates the Comments of a Post from the oldest Comment to the newest.
+    The id is used as the tie breaker for Comments created at the same instant.
+    """
+    ordering = ('created_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Paginates the ranked search results by page number, as the rank is not a stable position for a cursor.
+    Unlike PageNumberPagination, the matches are not counted, which would cost as much as the search itself
+    for common terms. One more result than the page size is fetched to know whether there is a next page.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # The deep pages are rarely requested and the database ranks every result before them.
+    max_page = 50
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.page_number = 0
+        if not 1 <= self.page_number <= self.max_page:
+            raise NotFound(_('Invalid page.'))
+
+        offset = (self.page_number - 1) * page_size
+        results = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(results) > page_size and self.page_number < self.max_page
+        self.has_previous = self.page_number > 1
+        return results[:page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,169 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Post, Like, Dislike
+
+# A user can either like or dislike a post. Every reaction has an opposite reaction that is removed
+# when the reaction is made, along with the counter on the Post that is maintained for it.
+
+REACTIONS = {
+    'like': (Like, 'like_count'),
+    'dislike': (Dislike, 'dislike_count'),
+}
+OPPOSITES = {
+    'like': 'dislike',
+    'dislike': 'like',
+}
+
+
+def react(post_id, user, reaction):
+    """
+    Makes the reaction (like or dislike) of the user on the post and removes the opposite reaction.
+    Reacting again is a no-op, so retried requests neither fail on the unique constraint nor change the counters.
+
+    Args:
+        post_id: Primary key of the post.
+        user: The user who reacts to the post.
+        reaction: Either 'like' or 'dislike'.
+
+    Returns:
+        The state of the post after the reaction. See reaction_state.
+
+    Raises:
+        Post.DoesNotExist: If the post does not exist. Nothing is changed in that case.
+    """
+    model, counter = REACTIONS[reaction]
+    opposite_model, opposite_counter = REACTIONS[OPPOSITES[reaction]]
+
+    with transaction.atomic():
+        removed, _ = opposite_model.objects.filter(post_id=post_id, user=user).delete()
+        _, created = model.objects.get_or_create(post_id=post_id, user=user)
+        if created or removed:
+            Post.objects.filter(pk=post_id).update(**{
+                counter: F(counter) + int(created),
+                opposite_counter: F(opposite_counter) - removed,
+                'modified_at': timezone.now(),
+            })
+        return reaction_state(post_id, user)
+
+
+def unreact(post_id, user, reaction):
+    """
+    Removes the reaction (like or dislike) of the user on the post. Removing a missing reaction is a no-op.
+
+    Args:
+        post_id: Primary key of the post.
+        user: The user whose reaction is removed.
+        reaction: Either 'like' or 'dislike'.
+
+    Returns:
+        The state of the post after the reaction is removed. See reaction_state.
+
+    Raises:
+        Post.DoesNotExist: If the post does not exist.
+    """
+    model, counter = REACTIONS[reaction]
+
+    with transaction.atomic():
+        removed, _ = model.objects.filter(post_id=post_id, user=user).delete()
+        if removed:
+            Post.objects.filter(pk=post_id).update(**{counter: F(counter) - removed, 'modified_at': timezone.now()})
+        return reaction_state(post_id, user)
+
+
+def reaction_state(post_id, user):
+    """
+    Fetches the number of likes and dislikes of the post and the reactions of the user in a single query.
+    When called inside a transaction, a missing post rolls back the changes made in the transaction.
+
+    Args:
+        post_id: Primary key of the post.
+        user: The user whose reactions are fetched.
+
+    Returns:
+        A dictionary with the keys likes, dislikes, user_liked and user_disliked.
+    """
+    state = Post.objects.with_reactions(user).filter(pk=post_id).values(
+        'like_count', 'dislike_count', 'user_liked', 'user_disliked').first()
+    if state is None:
+        raise Post.DoesNotExist('Post does not exist in the database.')
+    return format_state(state)
+
+
+def format_state(state):
+    """
+    Renames the values fetched by reaction_state to the keys of the response.
+    """
+    return {
+        'likes': state['like_count'],
+        'dislikes': state['dislike_count'],
+        'user_liked': state['user_liked'],
+        'user_disliked': state['user_disliked'],
+    }
+
+
+# The changes that every operation of a bulk request makes to the user's (like, dislike) reactions on a post.
+# True creates the reaction, False removes it and None leaves it unchanged.
+OPERATIONS = {
+    'like': (True, False),
+    'dislike': (False, True),
+    'removelike': (False, None),
+    'removedislike': (None, False),
+}
+
+
+def bulk_react(user, operations):
+    """
+    Applies many reaction operations of the user in a single transaction.
+    The operations are reduced to the final reactions on every post, which are then written with one
+    bulk insert and one delete per reaction model. The counters of the affected posts are recomputed
+    with a single UPDATE. Like react and unreact, repeating an operation is a no-op.
+
+    Args:
+        user: The user who reacts to the posts.
+        operations: A list of dictionaries with the keys post (primary key of the post) and reaction
+            (one of like, dislike, removelike and removedislike), applied in order.
+
+    Returns:
+        A list with the result of every operation, in the order of the operations. Successful results
+        contain the state of the post after all the operations. See reaction_state.
+    """
+    results = []
+    changes = {}
+    for operation in operations:
+        post_id, reaction = operation.get('post'), operation.get('reaction')
+        if reaction not in OPERATIONS or not isinstance(post_id, int) or isinstance(post_id, bool):
+            results.append({'post': post_id, 'reaction': reaction, 'error': 'Invalid operation.'})
+            continue
+        results.append({'post': post_id, 'reaction': reaction})
+
+        # Later operations on a post override the earlier ones.
+        like, dislike = changes.get(post_id, (None, None))
+        new_like, new_dislike = OPERATIONS[reaction]
+        changes[post_id] = (like if new_like is None else new_like, dislike if new_dislike is None else new_dislike)
+
+    existing = set(Post.objects.filter(pk__in=changes).values_list('pk', flat=True))
+    changes = {post_id: change for post_id, change in changes.items() if post_id in existing}
+
+    with transaction.atomic():
+        for index, model in enumerate((Like, Dislike)):
+            removed = [post_id for post_id, change in changes.items() if change[index] is False]
+            created = [post_id for post_id, change in changes.items() if change[index]]
+            model.objects.filter(user=user, post_id__in=removed).delete()
+            model.objects.bulk_create([model(post_id=post_id, user=user) for post_id in created], ignore_conflicts=True)
+
+        # The inserts ignore the reactions that already exist, so the counters are recomputed from the rows.
+        Post.objects.filter(pk__in=changes).recount_counters()
+
+    states = Post.objects.with_reactions(user).filter(pk__in=changes).values(
+        'pk', 'like_count', 'dislike_count', 'user_liked', 'user_disliked')
+    states = {state['pk']: state for state in states}
+    for result in results:
+        if 'error' in result:
+            continue
+        state = states.get(result['post'])
+        if state is None:
+            result['error'] = 'Post does not exist in the database.'
+            continue
+        result.update(format_state(state))
+    return results
@@ -0,0 +1,135 @@
+import re
+from django.db import connection, connections
+
+# The full-text search of the Posts by their title and description.
+#
+# On PostgreSQL, the weighted tsvector of the title and the description of every Post is stored in the search_vector
+# column of the posts_post table, which is searched with a GIN index. The column is not a field of the Post model,
+# it is set by a trigger when a Post is created or its title or description change. As the tsvector is stored,
+# ranking the matches does not parse the title and the description of every match again.
+# On SQLite, the Posts are searched with an FTS5 table indexing the title and the description, which is kept in sync
+# with the posts_post table by triggers. Both stem the English words, so a search for "donate" matches "donations".
+#
+# The title weighs more than the description in the rank of the results on both.
+
+SEARCH_CONFIG = 'english'
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce({row}.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}.description, '')), 'B')"
+)
+SEARCH_TABLE = 'posts_post_search'
+
+
+def create_search_index(schema_editor):
+    """
+    Creates the search index of the Posts on PostgreSQL or SQLite, indexing the existing Posts.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE posts_post ADD COLUMN search_vector tsvector')
+        schema_editor.execute(
+            'CREATE FUNCTION posts_post_search_vector() RETURNS trigger AS $$ BEGIN '
+            'NEW.search_vector := %s; RETURN NEW; '
+            'END $$ LANGUAGE plpgsql' % SEARCH_VECTOR.format(row='NEW'))
+        schema_editor.execute(
+            'CREATE TRIGGER posts_post_search_vector BEFORE INSERT OR UPDATE OF title, description ON posts_post '
+            'FOR EACH ROW EXECUTE PROCEDURE posts_post_search_vector()')
+        schema_editor.execute('UPDATE posts_post SET search_vector = %s' % SEARCH_VECTOR.format(row='posts_post'))
+        schema_editor.execute('CREATE INDEX post_search_idx ON posts_post USING GIN (search_vector)')
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5("
+            "title, description, content='posts_post', content_rowid='id', tokenize='porter unicode61')" % SEARCH_TABLE)
+        schema_editor.execute("INSERT INTO %s(%s) VALUES ('rebuild')" % (SEARCH_TABLE, SEARCH_TABLE))
+        create_search_triggers(schema_editor.connection)
+
+
+def drop_search_index(schema_editor):
+    """
+    Drops the search index of the Posts.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP TRIGGER IF EXISTS posts_post_search_vector ON posts_post')
+        schema_editor.execute('DROP FUNCTION IF EXISTS posts_post_search_vector()')
+        schema_editor.execute('ALTER TABLE posts_post DROP COLUMN IF EXISTS search_vector')
+    elif vendor == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute('DROP TRIGGER IF EXISTS %s_%s' % (SEARCH_TABLE, trigger))
+        schema_editor.execute('DROP TABLE IF EXISTS %s' % SEARCH_TABLE)
+
+
+def create_search_triggers(connection):
+    """
+    Creates the triggers keeping the FTS5 table in sync with the posts_post table on SQLite.
+
+    SQLite alters a table by copying it into a new table, which drops the triggers of the table.
+    The rows and their ids are copied as they are, so the FTS5 table stays valid but the triggers are recreated
+    after every migration, see PostsConfig.ready.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SEARCH_TABLE])
+        if cursor.fetchone() is None:
+            return
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON posts_post BEGIN '
+            'INSERT INTO {table}(rowid, title, description) VALUES (new.id, new.title, new.description); '
+            'END'.format(table=SEARCH_TABLE))
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON posts_post BEGIN '
+            "INSERT INTO {table}({table}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+            'END'.format(table=SEARCH_TABLE))
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF title, description ON posts_post BEGIN '
+            "INSERT INTO {table}({table}, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+            'INSERT INTO {table}(rowid, title, description) VALUES (new.id, new.title, new.description); '
+            'END'.format(table=SEARCH_TABLE))
+
+
+def search_terms(query):
+    """
+    Returns the words of the search query, ignoring the operators of the query syntax of the databases.
+    """
+    return re.findall(r'\w+', query)
+
+
+def search_posts(queryset, query):
+    """
+    Filters the Posts of the queryset matching every word of the query and orders them from the best match
+    to the worst. The rank of every Post is annotated as rank.
+
+    Args:
+        queryset: The queryset of the Posts.
+        query: The search query.
+
+    Returns:
+        The filtered queryset.
+    """
+    terms = search_terms(query)
+    if connection.vendor == 'postgresql':
+        tsquery = "plainto_tsquery('%s', %%s)" % SEARCH_CONFIG
+        queryset = queryset.extra(
+            select={'rank': 'ts_rank(posts_post.search_vector, %s)' % tsquery},
+            select_params=[' '.join(terms)],
+            where=['posts_post.search_vector @@ %s' % tsquery],
+            params=[' '.join(terms)],
+        )
+    else:
+        # bm25() is lower for better matches. The terms are quoted, so that they are not read as FTS5 operators.
+        queryset = queryset.extra(
+            select={'rank': '-bm25({table}, 10.0, 1.0)'.format(table=SEARCH_TABLE)},
+            tables=[SEARCH_TABLE],
+            where=['{table}.rowid = posts_post.id'.format(table=SEARCH_TABLE), '{table} MATCH %s'.format(table=SEARCH_TABLE)],
+            params=[' '.join('"%s"' % term for term in terms)],
+        )
+    return queryset.order_by('-rank', '-id')
+
+
+def restore_search_triggers(sender, using, **kwargs):
+    """
+    Recreates the triggers of the FTS5 table dropped by the migrations altering the posts_post table on SQLite.
+    Connected to the post_migrate signal.
+    """
+    create_search_triggers(connections[using])
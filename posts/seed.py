@@ -0,0 +1,86 @@
+import datetime
+import random
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Post, Like, Dislike, Comment
+
+# Seeds the database with generated users, posts, reactions and comments for benchmarks.
+# The rows are written with bulk inserts, so that large volumes can be seeded quickly.
+
+
+def seed(users=100, posts=1000, reactions=5000, comments=5000, prefix='seed', batch_size=1000, random_seed=0):
+    """
+    Creates generated users, posts, reactions and comments in the database.
+
+    Args:
+        users: Number of users to create.
+        posts: Number of posts to create. Every tenth post is disabled.
+        reactions: Number of likes and dislikes to create. Every fourth reaction is a dislike.
+        comments: Number of comments to create. Every tenth comment is disabled.
+        prefix: Prefix of the usernames, which must not be used by existing users.
+        batch_size: Number of rows written by a single insert.
+        random_seed: Seed of the random number generator, so that the generated data is reproducible.
+
+    Returns:
+        A tuple of the lists of the primary keys of the created users and posts.
+    """
+    generator = random.Random(random_seed)
+    now = timezone.now()
+
+    with transaction.atomic():
+        # The users are created with an unusable password, hashing a password for every user would take seconds.
+        bulk_insert(User, [
+            User(username='%s-%d' % (prefix, i), email='%s-%d@example.com' % (prefix, i), password='!')
+            for i in range(users)
+        ], batch_size)
+        seeded_users = User.objects.filter(username__startswith='%s-' % prefix)
+        user_ids = list(seeded_users.values_list('pk', flat=True))
+
+        bulk_insert(Post, [
+            Post(
+                owner_id=generator.choice(user_ids),
+                title='Post %d' % i,
+                description='Description of the post %d. ' % i * 5,
+                due_date=(now + datetime.timedelta(days=generator.randint(1, 365))).date(),
+                active=i % 10 != 0,
+                required_amount=generator.randint(1, 100) * 1000,
+                collected_amount=generator.randint(0, 100) * 500,
+            ) for i in range(posts)
+        ], batch_size)
+        seeded_posts = Post.objects.filter(owner__in=seeded_users)
+        post_ids = list(seeded_posts.values_list('pk', flat=True))
+
+        # Every (post, user) pair reacts at most once.
+        pairs = set()
+        while len(pairs) < min(reactions, len(post_ids) * len(user_ids)):
+            pairs.add((generator.choice(post_ids), generator.choice(user_ids)))
+        pairs = sorted(pairs)
+        bulk_insert(Like, [
+            Like(post_id=post_id, user_id=user_id) for i, (post_id, user_id) in enumerate(pairs) if i % 4
+        ], batch_size)
+        bulk_insert(Dislike, [
+            Dislike(post_id=post_id, user_id=user_id) for i, (post_id, user_id) in enumerate(pairs) if not i % 4
+        ], batch_size)
+
+        bulk_insert(Comment, [
+            Comment(
+                post_id=generator.choice(post_ids),
+                user_id=generator.choice(user_ids),
+                body='Comment %d' % i,
+                disabled=i % 10 == 0,
+            ) for i in range(comments)
+        ], batch_size)
+
+        # The bulk inserts bypass the counters, which are recomputed at once.
+        seeded_posts.recount_counters()
+
+    return user_ids, post_ids
+
+
+def bulk_insert(model, objs, batch_size):
+    """
+    Inserts the objects in batches of at most batch_size rows, or less if the database limits the size of a query.
+    """
+    fields = model._meta.concrete_fields
+    model.objects.bulk_create(objs, batch_size=max(min(batch_size, connection.ops.bulk_batch_size(fields, objs)), 1))
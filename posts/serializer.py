@@ -9,9 +9,31 @@ from .models import Post, Like, Dislike, Comment
 # The Meta class is used to specify the Model and the fields in the model that needs to be serialized/deserialized.
 
 class PostSerializer(serializers.ModelSerializer):
+  # The owner is represented by the username. The owner is set from the request in PostViewSet.perform_create.
+  owner = serializers.ReadOnlyField(source='owner.username')
+
+  likes = serializers.IntegerField(source='like_count', read_only=True)
+  dislikes = serializers.IntegerField(source='dislike_count', read_only=True)
+  comments = serializers.IntegerField(source='comment_count', read_only=True)
+
+  # The user's reactions are read from the annotations of Post.objects.with_reactions().
+  # They are left out of the representation when the queryset is not annotated.
+  user_liked = serializers.BooleanField(read_only=True)
+  user_disliked = serializers.BooleanField(read_only=True)
+
   class Meta:
     model = Post
-    fields = '__all__'
+    exclude = ('like_count', 'dislike_count', 'comment_count')
+    # The collected amount is only changed by the donations. See posts/donations.py.
+    read_only_fields = ('collected_amount',)
+
+  def update(self, instance, validated_data):
+    # Only the changed fields are saved. Saving every field would overwrite the counters and the collected amount,
+    # which are incremented concurrently, with the values read at the start of the request.
+    for attr, value in validated_data.items():
+      setattr(instance, attr, value)
+    instance.save(update_fields=list(validated_data) + ['modified_at'])
+    return instance
 
 class LikeSerializer(serializers.ModelSerializer):
   class Meta:
@@ -23,7 +45,132 @@ class DislikeSerializer(serializers.ModelSerializer):
     model = Dislike
     fields = '__all__'
 
+# The largest amount a PositiveIntegerField holds on every database.
+MAX_DONATION_AMOUNT = 2147483647
+
+class DonationSerializer(serializers.Serializer):
+  # Validates the body of the donate endpoint.
+  amount = serializers.IntegerField(min_value=1, max_value=MAX_DONATION_AMOUNT)
+
 class CommentSerializer(serializers.ModelSerializer):
+  # The user who commented is represented by the username.
+  user = serializers.ReadOnlyField(source='user.username')
+
   class Meta:
     model = Comment
-    fields = '__all__'
\ No newline at end of file
+    fields = '__all__'
+
+# The list endpoints serialize the rows of values() querysets to plain dictionaries. This skips building a model
+# instance and running the field machinery of ModelSerializer for every row, which dominates the cost of large pages.
+# The rows have a compact set of fields by default. Clients can ask for a subset or for other fields of the full
+# representation with the fields query parameter, e.g. ?fields=id,title,likes.
+
+datetime_representation = serializers.DateTimeField().to_representation
+date_representation = serializers.DateField().to_representation
+
+class RowSerializer:
+  """
+  Serializes the rows of a values() queryset to dictionaries.
+
+  The fields map the name of every field to the column of the rows it is read from, and a function converting
+  the value of the column to its representation if it is not already a native Python datatype.
+  The required columns are always selected, e.g. the columns of the ordering of the cursor pagination.
+  """
+  fields = {}
+  default_fields = ()
+  required_columns = ()
+
+  def __init__(self, fields=None):
+    """
+    Args:
+      self: Represents the instance of the class.
+      fields: The names of the fields to serialize. The default fields are serialized if it is None.
+
+    Raises:
+      ValidationError: If a field does not exist.
+    """
+    if fields is None:
+      fields = self.default_fields
+    unknown = [name for name in fields if name not in self.fields]
+    if unknown:
+      raise serializers.ValidationError({'fields': 'Unknown fields: %s.' % ', '.join(unknown)})
+    self.names = list(dict.fromkeys(fields))
+
+  @classmethod
+  def from_request(cls, request):
+    """
+    Returns the serializer of the fields requested with the fields query parameter, if any.
+    """
+    fields = request.query_params.get('fields')
+    if fields is None:
+      return cls()
+    return cls([name.strip() for name in fields.split(',') if name.strip()])
+
+  def columns(self):
+    """
+    Returns the columns to be selected with values().
+    """
+    return list(dict.fromkeys([self.fields[name][0] for name in self.names] + list(self.required_columns)))
+
+  def serialize(self, rows):
+    """
+    Returns the representations of the rows.
+    """
+    fields = [(name,) + self.fields[name] for name in self.names]
+    representations = []
+    for row in rows:
+      representation = {}
+      for name, column, convert in fields:
+        value = row[column]
+        representation[name] = value if convert is None or value is None else convert(value)
+      representations.append(representation)
+    return representations
+
+class PostListSerializer(RowSerializer):
+  fields = {
+    'id': ('id', None),
+    'owner': ('owner__username', None),
+    'title': ('title', None),
+    'due_date': ('due_date', date_representation),
+    'description': ('description', None),
+    'active': ('active', None),
+    'verified': ('verified', None),
+    'verified_at': ('verified_at', datetime_representation),
+    'modified_at': ('modified_at', datetime_representation),
+    'created_at': ('created_at', datetime_representation),
+    'required_amount': ('required_amount', None),
+    'collected_amount': ('collected_amount', None),
+    'likes': ('like_count', None),
+    'dislikes': ('dislike_count', None),
+    'comments': ('comment_count', None),
+    'user_liked': ('user_liked', None),
+    'user_disliked': ('user_disliked', None),
+  }
+  default_fields = (
+    'id', 'owner', 'title', 'due_date', 'active', 'verified', 'created_at', 'required_amount', 'collected_amount',
+    'likes', 'dislikes', 'comments', 'user_liked', 'user_disliked',
+  )
+  # The columns of the ordering of PostCursorPagination and of the ETag of the Posts.
+  required_columns = ('id', 'created_at', 'modified_at', 'owner__username', 'like_count', 'dislike_count', 'comment_count')
+  # The reactions of the user are only annotated by Post.objects.with_reactions() for authenticated users.
+  reaction_fields = ('user_liked', 'user_disliked')
+
+  @classmethod
+  def from_request(cls, request):
+    serializer = super().from_request(request)
+    if not request.user.is_authenticated:
+      serializer.names = [name for name in serializer.names if name not in cls.reaction_fields]
+    return serializer
+
+class CommentListSerializer(RowSerializer):
+  fields = {
+    'id': ('id', None),
+    'post': ('post', None),
+    'user': ('user__username', None),
+    'body': ('body', None),
+    'disabled': ('disabled', None),
+    'created_at': ('created_at', datetime_representation),
+  }
+  default_fields = ('id', 'user', 'body', 'created_at')
+  # The columns of the ordering of CommentCursorPagination.
+  required_columns = ('id', 'created_at')
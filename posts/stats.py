@@ -0,0 +1,176 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .cache import CACHE_ALIAS
+from .models import Post
+from .serializer import PostListSerializer
+
+# The fundraising statistics of the active Posts.
+#
+# The totals are kept in the cache as one counter per total. When a Post is created, changed or deleted, its change
+# is applied to the counters with atomic increments, so the totals are always served from the cache without
+# aggregating the Posts. When a counter is missing, all of them are computed again with a single aggregate query.
+# The counters also expire after STATS_TIMEOUT, which bounds the drift from the changes made outside of the API,
+# e.g. in the admin.
+#
+# The leaderboards order the Posts by their progress and the owners by the amount they collected, which cannot be
+# maintained incrementally. They are computed with aggregate queries and cached as a snapshot for LEADERBOARD_TIMEOUT.
+
+STATS_TIMEOUT = getattr(settings, 'POSTS_STATS_TIMEOUT', 3600)
+LEADERBOARD_TIMEOUT = getattr(settings, 'POSTS_LEADERBOARD_TIMEOUT', 60)
+
+TOTALS = ('posts', 'funded_posts', 'required_amount', 'collected_amount')
+
+
+def totals_key(name):
+    return 'posts:stats:%s' % name
+
+
+def post_totals(post):
+    """
+    Returns the contribution of the Post to the totals. Disabled and deleted (None) Posts do not contribute.
+    """
+    if post is None or not post.active:
+        return dict.fromkeys(TOTALS, 0)
+    return {
+        'posts': 1,
+        'funded_posts': int(post.collected_amount >= post.required_amount),
+        'required_amount': post.required_amount,
+        'collected_amount': post.collected_amount,
+    }
+
+
+def update_totals(old, new):
+    """
+    Applies the change of a Post to the cached totals once the transaction is committed.
+
+    Args:
+        old: The contribution of the Post before the change, returned by post_totals.
+        new: The contribution of the Post after the change, returned by post_totals.
+    """
+    deltas = {name: new[name] - old[name] for name in TOTALS if new[name] != old[name]}
+    if deltas:
+        transaction.on_commit(lambda: apply_deltas(deltas))
+
+
+def apply_deltas(deltas):
+    """
+    Increments the cached totals by the deltas. If a total is not cached, all the totals are dropped,
+    so that they are computed again rather than mixing the counters of different snapshots.
+    """
+    cache = caches[CACHE_ALIAS]
+    for name, delta in deltas.items():
+        try:
+            if delta > 0:
+                cache.incr(totals_key(name), delta)
+            else:
+                cache.decr(totals_key(name), -delta)
+        except ValueError:
+            invalidate_totals()
+            return
+
+
+def invalidate_totals():
+    """
+    Drops the cached totals, so that they are computed again, e.g. after changes to many Posts.
+    """
+    caches[CACHE_ALIAS].delete_many([totals_key(name) for name in TOTALS])
+
+
+def compute_totals():
+    """
+    Aggregates the totals of the active Posts in a single query.
+    The totals are kept up to date with the changes once they are cached, so they are aggregated from the default
+    database rather than from a replica which may lag behind it, see jananihome/routers.py.
+    """
+    return Post.objects.using(DEFAULT_DB_ALIAS).filter(active=True).aggregate(
+        posts=Count('id'),
+        funded_posts=Count('id', filter=Q(collected_amount__gte=F('required_amount'))),
+        required_amount=Coalesce(Sum('required_amount'), 0),
+        collected_amount=Coalesce(Sum('collected_amount'), 0),
+    )
+
+
+def get_totals():
+    """
+    Returns the totals of the active Posts along with the percentage of the required amount collected.
+    """
+    cache = caches[CACHE_ALIAS]
+    cached = cache.get_many([totals_key(name) for name in TOTALS])
+    if len(cached) == len(TOTALS):
+        totals = {name: cached[totals_key(name)] for name in TOTALS}
+    else:
+        totals = compute_totals()
+        cache.set_many({totals_key(name): value for name, value in totals.items()}, timeout=STATS_TIMEOUT)
+    totals['percentage_funded'] = percentage(totals['collected_amount'], totals['required_amount'])
+    return totals
+
+
+def percentage(collected, required):
+    return round(collected * 100 / required, 2) if required else 100.0
+
+
+def get_leaderboard(limit=10, days=7):
+    """
+    Returns the leaderboards, computing them if their snapshot is not cached.
+
+    Args:
+        limit: The number of entries of every leaderboard.
+        days: The number of days within which the due date of the Posts nearing their due date falls.
+
+    Returns:
+        A dictionary of the open Posts closest to their goal, the open Posts nearing their due date and
+        the owners who collected the most.
+    """
+    cache = caches[CACHE_ALIAS]
+    key = 'posts:leaderboard:%d:%d' % (limit, days)
+    leaderboard = cache.get(key)
+    if leaderboard is None:
+        leaderboard = compute_leaderboard(limit, days)
+        cache.set(key, leaderboard, timeout=LEADERBOARD_TIMEOUT)
+    return leaderboard
+
+
+def compute_leaderboard(limit, days):
+    """
+    Computes the leaderboards with a query for each of them.
+    """
+    today = timezone.localdate()
+    # The open Posts are the active Posts which have not reached their goal nor their due date.
+    # Their required amount is never 0, as the collected amount is less than it.
+    open_posts = Post.objects.filter(active=True, due_date__gte=today, collected_amount__lt=F('required_amount'))
+    progress = ExpressionWrapper(F('collected_amount') * 1.0 / F('required_amount'), output_field=FloatField())
+    closest = open_posts.annotate(progress=progress).order_by('-progress', 'due_date', '-id')[:limit]
+    nearing = open_posts.filter(due_date__lte=today + timedelta(days=days)).order_by('due_date', '-id')[:limit]
+
+    owners = Post.objects.filter(active=True).values('owner__username').annotate(
+        posts=Count('id'), collected_amount=Sum('collected_amount'), required_amount=Sum('required_amount'),
+    ).order_by('-collected_amount', 'owner__username')[:limit]
+
+    return {
+        'closest_to_goal': serialize_progress(closest),
+        'nearing_due_date': serialize_progress(nearing),
+        'top_owners': [{
+            'owner': owner['owner__username'],
+            'posts': owner['posts'],
+            'required_amount': owner['required_amount'],
+            'collected_amount': owner['collected_amount'],
+            'percentage_funded': percentage(owner['collected_amount'], owner['required_amount']),
+        } for owner in owners],
+    }
+
+
+def serialize_progress(posts):
+    """
+    Serializes the Posts of a leaderboard along with the percentage of their required amount collected.
+    """
+    serializer = PostListSerializer(['id', 'owner', 'title', 'due_date', 'required_amount', 'collected_amount'])
+    rows = list(posts.values(*serializer.columns()))
+    data = serializer.serialize(rows)
+    for post, row in zip(data, rows):
+        post['percentage_funded'] = percentage(row['collected_amount'], row['required_amount'])
+    return data
@@ -1,3 +1,708 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+from django.utils.http import http_date
+from knox.models import AuthToken
+from rest_framework.test import APIClient
+from .api import PostViewSet
+from .cache import last_modified
+from .models import Post, Like, Dislike, Comment, Donation
+from .serializer import PostSerializer
+from . import benchmark, donations
 
 # Create your tests here.
+
+
+def create_post(owner, **fields):
+    """
+    Creates a Post owned by the given user with sensible defaults for the required fields.
+    """
+    fields.setdefault('title', 'Post')
+    fields.setdefault('description', 'Description')
+    fields.setdefault('due_date', '2030-01-01')
+    fields.setdefault('required_amount', 1000)
+    return Post.objects.create(owner=owner, **fields)
+
+
+class PostsTestCase(TestCase):
+
+    def setUp(self):
+        # The cached responses of the anonymous requests would otherwise leak between the tests.
+        cache.clear()
+        self.client = APIClient()
+
+
+class PostListTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create_user('user%d' % i, password='password') for i in range(3)]
+
+    def test_list_is_paginated(self):
+        for i in range(5):
+            create_post(self.users[0], title='Post %d' % i)
+        create_post(self.users[0], active=False)
+
+        response = self.client.get('/api/posts/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['title'] for post in response.data['results']], ['Post 4', 'Post 3'])
+        self.assertEqual(response.data['results'][0]['owner'], 'user0')
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([post['title'] for post in response.data['results']], ['Post 2', 'Post 1'])
+
+    def test_list_includes_user_reactions(self):
+        liked, disliked, other = create_post(self.users[1]), create_post(self.users[1]), create_post(self.users[2])
+        Like.objects.create(post=liked, user=self.users[0])
+        Dislike.objects.create(post=disliked, user=self.users[0])
+        Like.objects.create(post=other, user=self.users[1])
+
+        self.client.force_authenticate(self.users[0])
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/posts/')
+        reactions = {post['id']: (post['user_liked'], post['user_disliked']) for post in response.data['results']}
+        self.assertEqual(reactions, {liked.pk: (True, False), disliked.pk: (False, True), other.pk: (False, False)})
+
+        response = self.client.get('/api/posts/user1/active/')
+        self.assertEqual({post['id']: post['user_liked'] for post in response.data['results']},
+                         {liked.pk: True, disliked.pk: False})
+
+    def test_list_fields(self):
+        post = create_post(self.users[0], description='Description')
+        response = self.client.get('/api/posts/')
+        self.assertNotIn('description', response.data['results'][0])
+        self.assertEqual(response.data['results'][0], {
+            'id': post.pk, 'owner': 'user0', 'title': 'Post', 'due_date': '2030-01-01', 'active': True,
+            'verified': False, 'created_at': PostSerializer(post).data['created_at'], 'required_amount': 1000,
+            'collected_amount': 0, 'likes': 0, 'dislikes': 0, 'comments': 0,
+        })
+
+        response = self.client.get('/api/posts/', {'fields': 'id,description,likes'})
+        self.assertEqual(response.data['results'], [{'id': post.pk, 'description': 'Description', 'likes': 0}])
+        response = self.client.get('/api/posts/user0/active/', {'fields': 'title'})
+        self.assertEqual(response.data['results'], [{'title': 'Post'}])
+
+        response = self.client.get('/api/posts/', {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        for i in range(30):
+            create_post(self.users[i % 3])
+        for page_size in (1, 10, 30):
+            with self.assertNumQueries(1):
+                self.client.get('/api/posts/', {'page_size': page_size})
+
+
+class PostRetrieveTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create_user('owner', password='password')
+        self.viewer = User.objects.create_user('viewer', password='password')
+        self.post = create_post(self.owner, like_count=2)
+        Like.objects.create(post=self.post, user=self.viewer)
+        Like.objects.create(post=self.post, user=self.owner)
+        Dislike.objects.create(post=create_post(self.owner, dislike_count=1), user=self.viewer)
+
+    def test_retrieve_is_a_single_query(self):
+        self.client.force_authenticate(self.viewer)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/posts/%d/' % self.post.pk)
+        self.assertEqual(response.data['owner'], 'owner')
+        self.assertEqual(response.data['likes'], 2)
+        self.assertEqual(response.data['dislikes'], 0)
+        self.assertTrue(response.data['user_liked'])
+        self.assertFalse(response.data['user_disliked'])
+
+    def test_retrieve_anonymous_skips_user_reactions(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/posts/%d/' % self.post.pk)
+        self.assertEqual(response.data['likes'], 2)
+        self.assertNotIn('user_liked', response.data)
+        self.assertNotIn('user_disliked', response.data)
+
+
+class ReactionTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('user', password='password')
+        self.post = create_post(self.user)
+        self.client.force_authenticate(self.user)
+
+    def assertCounts(self, likes, dislikes):
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.dislike_count), (likes, dislikes))
+
+    def test_reactions_update_the_counters(self):
+        self.client.post('/api/posts/%d/like/' % self.post.pk)
+        self.assertCounts(1, 0)
+        self.client.post('/api/posts/%d/dislike/' % self.post.pk)
+        self.assertCounts(0, 1)
+        self.client.post('/api/posts/%d/removedislike/' % self.post.pk)
+        self.assertCounts(0, 0)
+        self.client.post('/api/posts/%d/like/' % self.post.pk)
+        self.client.post('/api/posts/%d/removelike/' % self.post.pk)
+        self.assertCounts(0, 0)
+
+    def test_recountreactions_repairs_the_counters(self):
+        Like.objects.create(post=self.post, user=self.user)
+        Post.objects.filter(pk=self.post.pk).update(dislike_count=3)
+        call_command('recountreactions', stdout=StringIO())
+        self.assertCounts(1, 0)
+
+    def test_reactions_are_idempotent(self):
+        for _ in range(2):
+            response = self.client.post('/api/posts/%d/like/' % self.post.pk)
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'likes': 1, 'dislikes': 0, 'user_liked': True, 'user_disliked': False})
+        for _ in range(2):
+            response = self.client.post('/api/posts/%d/removelike/' % self.post.pk)
+        self.assertEqual(response.data, {'likes': 0, 'dislikes': 0, 'user_liked': False, 'user_disliked': False})
+        self.assertCounts(0, 0)
+
+    def test_reaction_on_missing_post(self):
+        response = self.client.post('/api/posts/0/like/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Like.objects.exists())
+
+    def test_bulk_reactions(self):
+        other = create_post(self.user)
+        Dislike.objects.create(post=other, user=self.user)
+        Post.objects.filter(pk=other.pk).update(dislike_count=1)
+
+        response = self.client.post('/api/posts/reactions/', [
+            {'post': self.post.pk, 'reaction': 'dislike'},
+            {'post': self.post.pk, 'reaction': 'like'},
+            {'post': other.pk, 'reaction': 'like'},
+            {'post': other.pk, 'reaction': 'like'},
+            {'post': 0, 'reaction': 'like'},
+            {'post': other.pk, 'reaction': 'love'},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data
+        self.assertEqual(results[1], {'post': self.post.pk, 'reaction': 'like', 'likes': 1, 'dislikes': 0,
+                                      'user_liked': True, 'user_disliked': False})
+        self.assertEqual((results[3]['likes'], results[3]['dislikes']), (1, 0))
+        self.assertIn('error', results[4])
+        self.assertIn('error', results[5])
+        self.assertCounts(1, 0)
+        self.assertFalse(Dislike.objects.exists())
+
+
+class CommentTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create_user('user%d' % i, password='password') for i in range(3)]
+        self.post = create_post(self.users[0])
+
+    def test_comments_are_paginated(self):
+        for i in range(6):
+            Comment.objects.create(post=self.post, user=self.users[i % 3], body='Comment %d' % i)
+        Comment.objects.create(post=self.post, user=self.users[0], body='Disabled', disabled=True)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/posts/%d/comment/' % self.post.pk, {'page_size': 4})
+        self.assertEqual([comment['body'] for comment in response.data['results']],
+                         ['Comment 0', 'Comment 1', 'Comment 2', 'Comment 3'])
+        self.assertEqual(response.data['results'][1]['user'], 'user1')
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([comment['body'] for comment in response.data['results']], ['Comment 4', 'Comment 5'])
+
+    def test_disablecomment_updates_the_comment_count(self):
+        comment = Comment.objects.create(post=self.post, user=self.users[0], body='Comment')
+        Post.objects.filter(pk=self.post.pk).update(comment_count=1)
+        self.client.force_authenticate(self.users[0])
+        self.client.post('/api/posts/disablecomment/', {'id': comment.pk})
+        self.client.post('/api/posts/disablecomment/', {'id': comment.pk})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+
+class SearchTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('owner', password='password')
+        # The responses of authenticated requests are not cached, so the changes made with the ORM are seen.
+        self.client.force_authenticate(self.user)
+
+    def search(self, query, **params):
+        response = self.client.get('/api/posts/search/', dict(params, q=query))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_search_ranks_the_title_above_the_description(self):
+        in_description = create_post(self.user, title='Fees', description='Help the school with donations')
+        in_title = create_post(self.user, title='School donations', description='Fees')
+        create_post(self.user, title='School donations', description='Disabled', active=False)
+        create_post(self.user, title='Other', description='Other')
+
+        results = self.search('donating SCHOOL').data['results']
+        self.assertEqual([post['id'] for post in results], [in_title.pk, in_description.pk])
+
+    def test_search_follows_changes_of_the_posts(self):
+        post = create_post(self.user, title='Books')
+        post.title = 'Uniforms'
+        post.save()
+        self.assertEqual(self.search('books').data['results'], [])
+        self.assertEqual(len(self.search('uniforms').data['results']), 1)
+        post.delete()
+        self.assertEqual(self.search('uniforms').data['results'], [])
+
+    def test_search_is_paginated(self):
+        for i in range(3):
+            create_post(self.user, title='Books %d' % i)
+        response = self.search('books', page_size=2, fields='title')
+        self.assertEqual(response.data['results'], [{'title': 'Books 2'}, {'title': 'Books 1'}])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'title': 'Books 0'}])
+        self.assertIsNone(response.data['next'])
+
+    def test_search_without_words(self):
+        self.assertEqual(self.client.get('/api/posts/search/', {'q': '" - *'}).status_code, 400)
+
+
+class StatsTest(TransactionTestCase):
+    # The cached totals are updated once the changes are committed, which never happens inside a TestCase.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, **fields):
+        data = {'title': 'Post', 'description': 'Description', 'due_date': '2030-01-01', 'required_amount': 1000}
+        data.update(fields)
+        return self.client.post('/api/posts/', data, format='json').data['id']
+
+    def test_totals_are_updated_incrementally(self):
+        create_post(self.user, collected_amount=500)
+        self.assertEqual(self.client.get('/api/posts/stats/').data['collected_amount'], 500)
+
+        funded = self.create(required_amount=100)
+        self.client.post('/api/posts/%d/donate/' % funded, {'amount': 100}, format='json')
+        toggled = self.create()
+        self.client.post('/api/posts/%d/donate/' % toggled, {'amount': 300}, format='json')
+        self.client.post('/api/posts/%d/toggle/' % toggled)
+        deleted = self.create()
+        self.client.delete('/api/posts/%d/' % deleted)
+
+        expected = {
+            'posts': 2, 'funded_posts': 1, 'required_amount': 1100, 'collected_amount': 600, 'percentage_funded': 54.55,
+        }
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/posts/stats/').data, expected)
+        cache.clear()
+        self.assertEqual(self.client.get('/api/posts/stats/').data, expected)
+        self.assertTrue(Post.objects.filter(pk=funded).exists())
+
+    def test_leaderboard(self):
+        today = timezone.localdate()
+        near = create_post(self.user, collected_amount=100, due_date=today + timedelta(days=2))
+        closest = create_post(self.user, collected_amount=900, due_date=today + timedelta(days=30))
+        create_post(self.user, collected_amount=1000)
+        create_post(self.user, collected_amount=990, due_date=today - timedelta(days=1))
+        other = User.objects.create_user('other', password='password')
+        create_post(other, collected_amount=50)
+
+        data = self.client.get('/api/posts/leaderboard/', {'limit': 2}).data
+        self.assertEqual([post['id'] for post in data['closest_to_goal']], [closest.pk, near.pk])
+        self.assertEqual(data['closest_to_goal'][0]['percentage_funded'], 90.0)
+        self.assertEqual([post['id'] for post in data['nearing_due_date']], [near.pk])
+        self.assertEqual([(owner['owner'], owner['collected_amount']) for owner in data['top_owners']],
+                         [('owner', 2990), ('other', 50)])
+        self.assertEqual(self.client.get('/api/posts/leaderboard/', {'limit': 100}).status_code, 400)
+
+
+class DonationTest(TransactionTestCase):
+    # The donations are made from many threads, which only see committed data.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('donor', password='password')
+        self.post = create_post(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def donate(self, amount, key=None, post=None):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post('/api/posts/%d/donate/' % (post or self.post).pk, {'amount': amount}, format='json', **headers)
+
+    def test_retried_donation_is_recorded_once(self):
+        response = self.donate(100, key='attempt')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['collected_amount'], 100)
+
+        retry = self.donate(100, key='attempt')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.data, response.data)
+        self.assertEqual(self.donate(50, key='attempt').status_code, 409)
+        self.assertEqual(self.donate(50).status_code, 201)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.collected_amount, 150)
+
+    def test_invalid_donations(self):
+        self.assertEqual(self.donate(0).status_code, 400)
+        self.assertEqual(self.donate('many').status_code, 400)
+        self.assertEqual(self.donate(2 ** 31).status_code, 400)
+        self.assertEqual(self.client.post('/api/posts/%d/donate/' % self.post.pk, [10], format='json').status_code, 400)
+        self.assertEqual(self.donate(10, key='k' * 65).status_code, 400)
+        response = self.client.post('/api/posts/%d/donate/' % self.post.pk, {'amount': 10}, format='json',
+                                    HTTP_IDEMPOTENCY_KEY='')
+        self.assertEqual(response.data, {'error': 'The Idempotency-Key must not be empty.'})
+        self.post.active = False
+        self.post.save()
+        self.assertEqual(self.donate(10).status_code, 400)
+        self.assertFalse(Donation.objects.exists())
+
+    def test_concurrent_donations(self):
+        def donate(key):
+            try:
+                return donations.donate(self.post.pk, self.user, 10, key)[1]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            created = list(executor.map(donate, ['key%d' % i for i in range(40)]))
+            retried = list(executor.map(donate, ['retried'] * 20))
+        self.assertTrue(all(created))
+        self.assertEqual(retried.count(True), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.collected_amount, 410)
+        self.assertEqual(Donation.objects.count(), 41)
+
+    def test_update_does_not_overwrite_the_collected_amount(self):
+        post = Post.objects.get(pk=self.post.pk)
+        self.donate(100)
+        serializer = PostSerializer(post, data={'title': 'Changed', 'collected_amount': 5}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.title, self.post.collected_amount), ('Changed', 100))
+
+    def test_import_is_idempotent(self):
+        other = create_post(self.user)
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('payment_id,post_id,amount,username\n')
+            file.write('p1,%d,100,donor\np2,%d,50,\np3,%d,25,\np4,0,10,\np1,%d,100,donor\n' % (
+                self.post.pk, self.post.pk, other.pk, self.post.pk))
+            file.write(',%d,10,\n%s,%d,10,\n' % (self.post.pk, 'p' * 93, self.post.pk))
+        self.addCleanup(os.remove, file.name)
+
+        out = StringIO()
+        call_command('importdonations', file.name, batch_size=2, stdout=out)
+        self.assertIn('Imported 3 donations, 1 were already recorded, 3 were invalid.', out.getvalue())
+        call_command('importdonations', file.name, stdout=out)
+        self.assertEqual(Donation.objects.count(), 3)
+        self.assertEqual(Donation.objects.get(key='payment:p1').user, self.user)
+        self.assertEqual(dict(Post.objects.values_list('pk', 'collected_amount')), {self.post.pk: 150, other.pk: 25})
+
+
+class TimelineTest(TransactionTestCase):
+    # The ids of the users are cached outside of the test transaction.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', password='password')
+        self.posts = [create_post(self.user, title='Post %d' % i) for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def titles(self, path, **params):
+        return [post['title'] for post in self.client.get(path, params).data['results']]
+
+    def test_user_is_cached(self):
+        self.assertEqual(self.titles('/api/posts/owner/active/'), ['Post 2', 'Post 1', 'Post 0'])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.titles('/api/posts/owner/active/'), ['Post 2', 'Post 1', 'Post 0'])
+        self.assertEqual(self.client.get('/api/posts/nobody/active/').status_code, 404)
+
+    def test_timeline_follows_the_changes(self):
+        self.titles('/api/posts/owner/active/')
+        self.client.post('/api/posts/%d/toggle/' % self.posts[1].pk)
+        self.client.post('/api/posts/', {
+            'title': 'Post 3', 'description': 'Description', 'due_date': '2030-01-01', 'required_amount': 1000,
+        }, format='json')
+        Post.objects.filter(pk=self.posts[2].pk).update(active=False)
+        self.assertEqual(self.titles('/api/posts/owner/active/'), ['Post 3', 'Post 0'])
+        self.assertEqual(self.titles('/api/posts/owner/disabled/'), ['Post 2', 'Post 1'])
+
+    def test_timeline_is_paginated(self):
+        response = self.client.get('/api/posts/owner/active/', {'page_size': 2})
+        self.assertEqual([post['title'] for post in response.data['results']], ['Post 2', 'Post 1'])
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data['next'])
+        self.assertEqual([post['title'] for post in response.data['results']], ['Post 0'])
+        self.assertIsNone(response.data['next'])
+
+
+class ExportTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_authenticate(self.user)
+        self.old, self.new = create_post(self.user, title='Old'), create_post(self.user, title='New')
+        Like.objects.create(post=self.old, user=self.user)
+        Like.objects.create(post=self.new, user=self.user)
+        Post.objects.filter(pk=self.old.pk).update(modified_at=timezone.now() - timedelta(days=2))
+
+    def export(self, name, **params):
+        response = self.client.get('/api/export/%s/' % name, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_export_is_streamed(self):
+        response, content = self.export('posts')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([(row['id'], row['title'], row['owner']) for row in rows],
+                         [(self.old.pk, 'Old', 'staff'), (self.new.pk, 'New', 'staff')])
+
+        response, content = self.export('likes', format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(content.splitlines(), ['id,post,user'] + [
+            '%d,%d,staff' % like for like in Like.objects.order_by('pk').values_list('pk', 'post_id')])
+
+    def test_incremental_export(self):
+        response, _ = self.export('posts')
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        for name, column in [('posts', 'id'), ('likes', 'post')]:
+            _, content = self.export(name, since=since)
+            self.assertEqual([json.loads(line)[column] for line in content.splitlines()], [self.new.pk])
+        # The rows changed shortly before the export, whose transactions may not have been committed yet,
+        # are exported again by the next export.
+        _, content = self.export('posts', since=response['X-Export-Watermark'])
+        self.assertEqual([json.loads(line)['id'] for line in content.splitlines()], [self.new.pk])
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(hours=1)):
+            response, _ = self.export('posts')
+        _, content = self.export('posts', since=response['X-Export-Watermark'])
+        self.assertEqual(content, '')
+
+    def test_export_errors(self):
+        self.assertEqual(self.client.get('/api/export/users/').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/posts/', {'since': 'yesterday'}).status_code, 400)
+        self.client.force_authenticate(User.objects.create_user('user', password='password'))
+        self.assertEqual(self.client.get('/api/export/posts/', {'format': 'csv'}).status_code, 403)
+
+    def test_export_command(self):
+        out, err = StringIO(), StringIO()
+        call_command('exportdata', 'posts', format='csv', since=(timezone.now() - timedelta(days=1)).isoformat(),
+                     stdout=out, stderr=err)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+        self.assertIn('Exported 1 rows.', err.getvalue())
+
+
+class ImportTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('partner', password='password')
+
+    def import_file(self, table, suffix, content, **options):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        out, err = StringIO(), StringIO()
+        call_command('importdata', table, file.name, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue().splitlines()
+
+    def test_import_posts(self):
+        out, errors = self.import_file('posts', '.csv', (
+            'owner,title,description,due_date,required_amount,verified_at,collected_amount\n'
+            'partner,School,Books for the school,2030-01-01,1000,,500\n'
+            'partner,,No title,2030-01-01,1000,,\n'
+            'nobody,Other,Description,2030-01-01,1000,,\n'
+            'partner,Well,Drinking water,2030-06-01,5000,2020-01-01T00:00:00Z,\n'), batch_size=2)
+        self.assertIn('Imported 2 posts', out)
+        self.assertEqual(errors, [
+            'Line 3: {"title": ["This field is required."]}',
+            'Line 4: {"owner": ["User does not exist."]}',
+        ])
+        self.assertEqual(list(Post.objects.order_by('pk').values_list('owner__username', 'title', 'collected_amount')),
+                         [('partner', 'School', 0), ('partner', 'Well', 0)])
+        self.assertEqual(self.client.get('/api/posts/search/', {'q': 'school'}).data['results'][0]['title'], 'School')
+
+    def test_import_profiles(self):
+        profile = {
+            'username': 'partner', 'dob': '1990-01-01', 'phone': '1234567890', 'phone_alt': '1234567890',
+            'gender': 'F', 'is_student': False, 'workplace_name': 'Partner', 'workplace_address': 'Address',
+            'address': 'Address', 'city': 'City', 'state': 'State', 'zipcode': '600001',
+        }
+        lines = [json.dumps(profile), json.dumps(profile), 'not json', json.dumps(dict(profile, dob='never'))]
+        out, errors = self.import_file('profiles', '.ndjson', '\n'.join(lines))
+        self.assertIn('Imported 1 profiles', out)
+        self.assertEqual([error.split(':')[0] for error in errors], ['Line 2', 'Line 3', 'Line 4'])
+        self.assertEqual(self.user.profile.city, 'City')
+
+
+class ResponseCacheTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('user', password='password')
+        self.post = create_post(self.user)
+
+    def test_anonymous_responses_are_cached(self):
+        self.client.get('/api/posts/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(len(response.data['results']), 1)
+
+        # Requests with a matching ETag are answered without the data.
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_invalidate_the_cached_responses(self):
+        url = '/api/posts/%d/' % self.post.pk
+        self.assertEqual(self.client.get(url).data['likes'], 0)
+        self.assertEqual(self.client.get('/api/posts/').data['results'][0]['likes'], 0)
+
+        writer = APIClient()
+        writer.force_authenticate(self.user)
+        writer.post('/api/posts/%d/like/' % self.post.pk)
+        self.assertEqual(self.client.get(url).data['likes'], 1)
+        self.assertEqual(self.client.get('/api/posts/').data['results'][0]['likes'], 1)
+
+        writer.post('/api/posts/%d/toggle/' % self.post.pk)
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get('/api/posts/').data['results'], [])
+
+
+class ConditionalRequestTest(PostsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('user', password='password')
+        self.post = create_post(self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve_is_not_modified(self):
+        url = '/api/posts/%d/' % self.post.pk
+        response = self.client.get(url)
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        etag = response['ETag']
+        self.client.post('/api/posts/%d/comment/' % self.post.pk, {'comment': 'Comment'})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['comments'], 1)
+
+    def test_list_is_not_modified(self):
+        etag = self.client.get('/api/posts/')['ETag']
+        self.assertEqual(self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.post('/api/posts/%d/like/' % self.post.pk)
+        response = self.client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['user_liked'])
+
+    def test_lists_carry_the_last_modification_of_their_page(self):
+        older = create_post(self.user, title='Older')
+        Post.objects.filter(pk=older.pk).update(modified_at=timezone.now() - timedelta(days=1))
+        self.post.refresh_from_db()
+        for path in ['/api/posts/', '/api/posts/search/?q=post', '/api/posts/user/active/']:
+            response = self.client.get(path)
+            self.assertEqual(response['Last-Modified'], http_date(last_modified(self.post)))
+
+        # The lists are only compared by their ETag, as a Post leaving the page can precede the last modification.
+        response = self.client.get('/api/posts/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+
+
+class QueryBudgetTest(TransactionTestCase):
+    # The benchmark runs outside of a test transaction, so that the queries are counted as in production.
+
+    def test_endpoints_stay_within_their_query_budget(self):
+        results = benchmark.run(users=5, posts=50, reactions=100, comments=100, iterations=3)
+        self.assertEqual(benchmark.over_budget(results), [])
+
+
+class ASGIHandlerTest(TransactionTestCase):
+    # The views served by the ASGI handler run in other threads, which only see committed data.
+
+    def setUp(self):
+        cache.clear()
+        self.application = ASGIHandler()
+        self.user = User.objects.create_user('owner', password='password')
+        self.token = AuthToken.objects.create(self.user)[1]
+        self.posts = [create_post(self.user, title='Post %d' % i) for i in range(3)]
+        create_post(self.user, title='Disabled', active=False)
+        Like.objects.create(post=self.posts[0], user=self.user)
+        Post.objects.filter(pk=self.posts[0].pk).update(like_count=1)
+        Comment.objects.create(post=self.posts[0], user=self.user, body='Comment')
+
+    def get(self, path, **headers):
+        headers = [(name.replace('_', '-'), value) for name, value in headers.items()]
+        status, headers, body = async_to_sync(benchmark.asgi_get)(self.application, path, headers=headers)
+        return status, headers, json.loads(body) if body else None
+
+    def assertSameResponse(self, path, token=None):
+        cache.clear()
+        client = APIClient()
+        headers = {}
+        if token:
+            client.credentials(HTTP_AUTHORIZATION='Token %s' % token)
+            headers['Authorization'] = 'Token %s' % token
+        expected = client.get(path)
+        cache.clear()
+        status, response_headers, data = self.get(path, **headers)
+        self.assertEqual(status, expected.status_code)
+        self.assertEqual(data, json.loads(expected.content))
+        self.assertEqual(response_headers.get('ETag'), expected.get('ETag'))
+        return response_headers
+
+    def test_responses_match_the_wsgi_responses(self):
+        for path in ['/api/posts/', '/api/posts/%d/' % self.posts[0].pk, '/api/posts/%d/comment/' % self.posts[0].pk,
+                     '/api/posts/owner/active/', '/api/posts/0/', '/api/posts/0/comment/']:
+            self.assertSameResponse(path)
+            self.assertSameResponse(path, self.token)
+
+    def test_retrieve_includes_user_reactions(self):
+        status, _, data = self.get('/api/posts/%d/' % self.posts[0].pk, Authorization='Token %s' % self.token)
+        self.assertEqual(status, 200)
+        self.assertTrue(data['user_liked'])
+        self.assertFalse(data['user_disliked'])
+
+    def test_conditional_request_is_not_modified(self):
+        _, headers, _ = self.get('/api/posts/%d/' % self.posts[1].pk)
+        status, _, _ = self.get('/api/posts/%d/' % self.posts[1].pk, If_None_Match=headers['ETag'])
+        self.assertEqual(status, 304)
+
+    def test_invalid_token_is_unauthorized(self):
+        status, headers, _ = self.get('/api/posts/', Authorization='Token invalid')
+        self.assertEqual(status, 401)
+        self.assertEqual(headers['WWW-Authenticate'], 'Token')
+
+    @override_settings(QUERY_BUDGETS={'MODE': 'log'})
+    def test_middleware_and_query_budgets_apply(self):
+        with mock.patch.dict(PostViewSet.query_budgets, {'retrieve': 0}):
+            with self.assertLogs('jananihome.querybudget', 'WARNING'):
+                status, headers, _ = self.get('/api/posts/%d/' % self.posts[1].pk)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['X-Frame-Options'], 'DENY')
+
+    def test_other_requests_are_served_by_django(self):
+        status, _, data = self.get('/api/posts/owner/disabled/', Authorization='Token %s' % self.token)
+        self.assertEqual(status, 200)
+        self.assertEqual([post['title'] for post in data['results']], ['Disabled'])
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from .cache import CACHE_ALIAS
+from .models import Post
+
+# The timelines of the users, i.e. their active and disabled Posts from the newest to the oldest,
+# which serve the active and disabled endpoints and the profile pages.
+#
+# A timeline is read by the id of its user and the state of the Posts with the post_owner_active_idx index,
+# which holds the Posts of every user and state in the order of the timelines, so a page of a timeline
+# costs a single query whatever the number of Posts of the user. The endpoints are paginated with a cursor.
+# The id of the user is cached by the username, so a request for the posts of a user does not look up the user.
+# A username only changes its id when its user is deleted and the username is taken again, which lists
+# the Posts of the new user after TIMELINE_TIMEOUT.
+# The ids are looked up in the default database rather than in a replica, which may lag behind it and miss
+# the users registered since. See jananihome/routers.py.
+
+TIMELINE_TIMEOUT = getattr(settings, 'POSTS_TIMELINE_TIMEOUT', 300)
+
+
+def timeline_key(username):
+    return 'posts:timeline:%s' % username
+
+
+def timeline_user(username):
+    """
+    Returns the id of the user, looking it up if it is not cached.
+
+    Args:
+        username: The username of the user.
+
+    Returns:
+        The id of the user, or None if the user does not exist.
+    """
+    cache = caches[CACHE_ALIAS]
+    user_id = cache.get(timeline_key(username))
+    if user_id is not None:
+        return user_id
+
+    user_id = User.objects.using(DEFAULT_DB_ALIAS).filter(username=username).values_list('pk', flat=True).first()
+    if user_id is not None:
+        cache.set(timeline_key(username), user_id, timeout=TIMELINE_TIMEOUT)
+    return user_id
+
+
+def timeline_posts(user_id, active=True):
+    """
+    Returns the queryset of the active or disabled Posts of the user, from the newest to the oldest.
+    """
+    return Post.objects.filter(owner_id=user_id, active=active).order_by('-created_at', '-id')
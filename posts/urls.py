@@ -1,5 +1,6 @@
+from django.urls import path
 from rest_framework import routers
-from .api import PostViewSet
+from .api import PostViewSet, ExportAPI
 
 # The Default Router includes a default API root view, that returns a response containing hyperlinks to all the list views. 
 # It also generates routes for optional .json style format suffixes.
@@ -7,4 +8,6 @@ from .api import PostViewSet
 router = routers.DefaultRouter()
 router.register('api/posts', PostViewSet, 'posts')
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls + [
+    path('api/export/<name>/', ExportAPI.as_view()),
+]